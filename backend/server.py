@@ -1,35 +1,695 @@
-from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, Form, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
+import orjson
 import asyncio
 import aiofiles
 import io
-from docx import Document
-import PyPDF2
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
+import csv
+import re
+import random
+import gzip
+import hashlib
+import time
+import bisect
+import math
+import threading
+import contextvars
+import importlib
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from pymongo import monitoring, UpdateOne
+from gridfs.errors import NoFile
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-# AI imports
-import openai
-import anthropic
-import google.generativeai as genai
+# The AI SDKs, httpx, PyPDF2, python-docx and openpyxl are slow to import and most
+# requests never touch them, so they are imported where they are first used.
+# warm_up() can load them ahead of traffic.
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Metrics
+# A minimal in-process registry rendered in the Prometheus text format.
+# Each metric keeps its samples in a dict keyed by the label values tuple,
+# so recording a sample is a lock, a dict lookup and an add.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+def _format_labels(names, values, extra=None) -> str:
+    """Render a label set as {name="value",...}"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    rendered = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        rendered.append(f'{name}="{value}"')
+    return "{" + ",".join(rendered) + "}"
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "genstudio_http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"))
+PROVIDER_CALL_SECONDS = metrics.histogram(
+    "genstudio_llm_request_duration_seconds", "AI provider call latency",
+    ("provider", "model"))
+PROVIDER_ERRORS = metrics.counter(
+    "genstudio_llm_request_errors_total", "AI provider calls that raised an error",
+    ("provider", "model"))
+LLM_TOKENS = metrics.counter(
+    "genstudio_llm_tokens_total", "Tokens reported by the AI provider",
+    ("provider", "model", "kind"))
+LLM_PARSE_FAILURES = metrics.counter(
+    "genstudio_llm_parse_failures_total", "AI responses that could not be parsed as test cases",
+    ("provider", "model"))
+FILE_EXTRACTION_SECONDS = metrics.histogram(
+    "genstudio_file_extraction_duration_seconds", "Text extraction time per uploaded file",
+    ("file_type",))
+MONGO_OPERATION_SECONDS = metrics.histogram(
+    "genstudio_mongo_operation_duration_seconds", "MongoDB command latency",
+    ("collection", "command", "outcome"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+EXPORT_SECONDS = metrics.histogram(
+    "genstudio_export_duration_seconds", "Time spent building export payloads",
+    ("format",))
+TOKEN_BUDGET_WAIT_SECONDS = metrics.histogram(
+    "genstudio_llm_token_budget_wait_seconds", "Time provider calls waited for the tokens-per-minute budget")
+ALM_SYNC_SECONDS = metrics.histogram(
+    "genstudio_alm_sync_duration_seconds", "ALM cache sync duration",
+    ("alm_type", "mode"))
+ALM_ITEMS_SYNCED = metrics.counter(
+    "genstudio_alm_items_synced_total", "Items fetched from an ALM into the local cache",
+    ("alm_type",))
+ALM_PUSHED_TEST_CASES = metrics.counter(
+    "genstudio_alm_pushed_test_cases_total", "Test cases pushed to an ALM by outcome",
+    ("alm_type", "outcome"))
+ALM_REQUEST_RETRIES = metrics.counter(
+    "genstudio_alm_request_retries_total", "ALM requests retried after a rate limit or unavailable response",
+    ("alm_type", "status"))
+TRANSCRIPT_DIGEST_SECONDS = metrics.histogram(
+    "genstudio_transcript_digest_duration_seconds", "Time to build a transcript digest",
+    ("method",))
+BATCH_REQUIREMENTS = metrics.counter(
+    "genstudio_batch_requirements_total", "Batch generation requirements by outcome",
+    ("outcome",))
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "genstudio_admission_wait_seconds", "Time expensive requests waited in the admission queue",
+    ("endpoint",))
+ADMISSION_REJECTIONS = metrics.counter(
+    "genstudio_admission_rejections_total", "Expensive requests turned away by admission control",
+    ("endpoint", "reason"))
+
+@contextmanager
+def observe_duration(histogram: Histogram, errors: Optional[Counter] = None, **labels):
+    """Time the enclosed block into a histogram, counting raised errors if asked"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, **labels)
+
+def record_token_usage(provider: str, model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int],
+                       cached_tokens: Optional[int] = None):
+    """Count the prompt/completion tokens a provider reported for a call"""
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, provider=provider, model=model, kind="completion")
+    if cached_tokens:
+        # Prompt tokens served from the provider's prefix cache, a subset of "prompt"
+        LLM_TOKENS.inc(cached_tokens, provider=provider, model=model, kind="cached_prompt")
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every MongoDB command's server round trip into a histogram"""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore carries the collection under "collection"
+            collection = event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_OPERATION_SECONDS.observe(
+            event.duration_micros / 1_000_000,
+            collection=collection, command=event.command_name, outcome=outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request latency labelled by the matched route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status["code"])
+
+# Tracing
+# Lightweight spans carried through the request in context variables. Finished
+# traces that recorded at least one pipeline span are kept in a ring buffer
+# and can optionally be shipped to an OTLP/HTTP collector as JSON.
+TRACE_BUFFER_SIZE = int(os.environ.get('TRACE_BUFFER_SIZE', '200'))
+TRACE_RESPONSE_HEADER = os.environ.get('TRACE_RESPONSE_HEADER', 'true').lower() not in ('0', 'false', 'no')
+OTLP_TRACES_ENDPOINT = os.environ.get('OTEL_EXPORTER_OTLP_TRACES_ENDPOINT', '')
+OTEL_SERVICE_NAME = os.environ.get('OTEL_SERVICE_NAME', 'genstudio-backend')
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "status")
+
+    def __init__(self, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Trace:
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.spans[0]
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started_at": datetime.utcfromtimestamp(root.start).isoformat(),
+            "duration_ms": round(((root.end or time.time()) - root.start) * 1000, 3),
+            "status": "error" if any(span.status == "error" for span in self.spans) else "ok",
+            "spans": [
+                {
+                    "name": span.name,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "offset_ms": round((span.start - root.start) * 1000, 3),
+                    "duration_ms": round(((span.end or time.time()) - span.start) * 1000, 3),
+                    "status": span.status,
+                    "attributes": span.attributes,
+                }
+                for span in self.spans
+            ],
+        }
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+recent_traces: deque = deque(maxlen=TRACE_BUFFER_SIZE)
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Record the enclosed block as a child span of the current trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    parent = _current_span.get()
+    span = Span(name, parent.span_id if parent else None, attributes)
+    trace.spans.append(span)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.attributes["error"] = str(e)
+        raise
+    finally:
+        span.end = time.time()
+        _current_span.reset(token)
+
+def _otlp_payload(trace: Trace) -> bytes:
+    def attribute(key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    spans = []
+    for span in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,  # SERVER for the root, INTERNAL otherwise
+            "startTimeUnixNano": str(int(span.start * 1e9)),
+            "endTimeUnixNano": str(int((span.end or span.start) * 1e9)),
+            "attributes": [attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2 if span.status == "error" else 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        spans.append(otlp_span)
+
+    return json.dumps({
+        "resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", OTEL_SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "genstudio"}, "spans": spans}],
+        }]
+    }).encode()
+
+def _export_otlp(payload: bytes):
+    request = urllib.request.Request(
+        OTLP_TRACES_ENDPOINT, data=payload, headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        urllib.request.urlopen(request, timeout=5).close()
+    except Exception as e:
+        logger.warning(f"OTLP trace export failed: {e}")
+
+def _parse_traceparent(header: Optional[str]) -> Optional[str]:
+    """Return the trace id from a W3C traceparent header, if well formed"""
+    if not header:
+        return None
+    parts = header.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and parts[1] != "0" * 32:
+        return parts[1]
+    return None
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per request and collecting finished traces"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent")
+        trace = Trace(_parse_traceparent(traceparent.decode("latin-1") if traceparent else None))
+        root = Span(f"{scope['method']} {scope['path']}")
+        trace.spans.append(root)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.status = "error"
+                if TRACE_RESPONSE_HEADER:
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", trace.trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            root.status = "error"
+            raise
+        finally:
+            root.end = time.time()
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            # Only keep traces that went through an instrumented pipeline
+            if len(trace.spans) > 1:
+                recent_traces.append(trace)
+                if OTLP_TRACES_ENDPOINT:
+                    asyncio.get_running_loop().run_in_executor(None, _export_otlp, _otlp_payload(trace))
+
+class TraceIdLogFilter(logging.Filter):
+    """Stamps log records with the id of the trace they were emitted under"""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+for _handler in logging.getLogger().handlers:
+    _handler.addFilter(TraceIdLogFilter())
+
+# Admission control
+# Generation, transcript uploads and exports hold file contents, provider
+# calls or whole workbooks in memory. Each class of them passes an
+# AdmissionGate: at most `concurrency` run at once and `queue_size` more wait
+# up to ADMISSION_QUEUE_TIMEOUT_SECONDS, while all classes share one memory
+# budget that every request reserves an estimate from. Anything beyond that
+# is answered at once (413 for oversized bodies, 429 when the queue is full,
+# 503 when the wait times out) with a Retry-After, and never reaches a
+# worker, so cheap endpoints keep their latency under overload.
+MB = 1024 * 1024
+
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() not in ('0', 'false', 'no')
+ADMISSION_MEMORY_BUDGET_BYTES = int(os.environ.get('ADMISSION_MEMORY_BUDGET_MB', '1024')) * MB
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', '30'))
+
+def _admission_setting(gate: str, setting: str, default: int) -> int:
+    """ADMISSION_<GATE>_<SETTING> from the environment, e.g. ADMISSION_GENERATE_CONCURRENCY"""
+    return int(os.environ.get(f'ADMISSION_{gate.upper()}_{setting}', str(default)))
+
+class AdmissionGate:
+    """Concurrency slots and a bounded wait queue for one class of expensive endpoints"""
+
+    def __init__(self, name: str, method: str, path: str, concurrency: int, queue_size: int,
+                 max_body_mb: int, base_memory_mb: int, body_memory_factor: float):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.concurrency = _admission_setting(name, 'CONCURRENCY', concurrency)
+        self.queue_size = _admission_setting(name, 'QUEUE', queue_size)
+        self.max_body_bytes = _admission_setting(name, 'MAX_BODY_MB', max_body_mb) * MB
+        self.base_memory = base_memory_mb * MB
+        # Parsed files, decoded text and extracted content are several times the raw body
+        self.body_memory_factor = body_memory_factor
+        self.active = 0
+        self.waiting = 0
+        self.average_seconds = 1.0  # moving average of admitted request durations, for Retry-After
+
+    def matches(self, scope) -> bool:
+        path = scope["path"]
+        return scope["method"] == self.method and (path == self.path or path.startswith(self.path + "/"))
+
+    def memory_needed(self, body_bytes: int) -> int:
+        # Capped so a lone request always fits an otherwise idle server
+        return min(self.base_memory + int(body_bytes * self.body_memory_factor), ADMISSION_MEMORY_BUDGET_BYTES)
+
+    def retry_after(self) -> int:
+        """Seconds until the requests ahead of a new one have likely drained"""
+        return max(1, min(60, math.ceil(self.average_seconds * (self.waiting + 1) / max(1, self.concurrency))))
+
+    def record(self, seconds: float):
+        self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+
+class AdmissionController:
+    """The shared memory budget, and one first-come, first-served queue of waiters across all gates"""
+
+    def __init__(self, gates: List[AdmissionGate], memory_budget: int):
+        self.gates = gates
+        self.memory_budget = memory_budget
+        self.memory_reserved = 0
+        # (gate, memory, future) per waiting request, oldest first
+        self._waiters: deque = deque()
+
+    def gate_for(self, scope) -> Optional[AdmissionGate]:
+        """The first gate matching the request"""
+        return next((gate for gate in self.gates if gate.matches(scope)), None)
+
+    def _grant(self):
+        """Admit waiters in arrival order while they fit
+
+        A waiter never overtakes an older one on its own gate, and once a waiter
+        is short of memory nobody behind it reserves memory, so large requests
+        are not starved by a stream of small ones.
+        """
+        blocked_gates = set()
+        memory_blocked = False
+        for waiter in list(self._waiters):
+            gate, memory, future = waiter
+            if future.done() or gate.name in blocked_gates:
+                continue
+            if gate.active >= gate.concurrency:
+                blocked_gates.add(gate.name)
+                continue
+            if memory_blocked or self.memory_reserved + memory > self.memory_budget:
+                memory_blocked = True
+                blocked_gates.add(gate.name)
+                continue
+            self._waiters.remove(waiter)
+            gate.active += 1
+            self.memory_reserved += memory
+            future.set_result(None)
+
+    def _free(self, gate: AdmissionGate, memory: int):
+        gate.active -= 1
+        self.memory_reserved -= memory
+        self._grant()
+
+    async def acquire(self, gate: AdmissionGate, memory: int) -> Optional[str]:
+        """Take a slot and reserve memory, waiting in the gate's queue if needed; returns why it was refused"""
+        future = asyncio.get_running_loop().create_future()
+        waiter = (gate, memory, future)
+        # Newcomers join the queue too, so they are admitted at once only when nobody is ahead of them
+        self._waiters.append(waiter)
+        self._grant()
+        if future.done():
+            return None
+        if gate.waiting >= gate.queue_size:
+            self._waiters.remove(waiter)
+            return "queue_full"
+
+        gate.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._free(gate, memory)  # admitted just as the request went away
+            raise
+        finally:
+            gate.waiting -= 1
+            ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, endpoint=gate.name)
+            if waiter in self._waiters:
+                # Waiters behind one that gave up may fit now
+                self._waiters.remove(waiter)
+                self._grant()
+        return None
+
+    async def release(self, gate: AdmissionGate, memory: int):
+        self._free(gate, memory)
+
+admission = AdmissionController([
+    # Batches stream for minutes under their own requirement concurrency limit,
+    # so they get slots of their own rather than holding single generations' slots
+    AdmissionGate("batch", "POST", "/api/generate-test-cases/batch", concurrency=2, queue_size=4,
+                  max_body_mb=10, base_memory_mb=16, body_memory_factor=4),
+    AdmissionGate("generate", "POST", "/api/generate-test-cases", concurrency=8, queue_size=32,
+                  max_body_mb=50, base_memory_mb=32, body_memory_factor=4),
+    AdmissionGate("upload", "POST", "/api/transcripts/upload", concurrency=4, queue_size=16,
+                  max_body_mb=20, base_memory_mb=8, body_memory_factor=3),
+    AdmissionGate("export", "GET", "/api/export", concurrency=4, queue_size=16,
+                  max_body_mb=0, base_memory_mb=64, body_memory_factor=0),
+], ADMISSION_MEMORY_BUDGET_BYTES)
+
+async def _send_rejection(send, status: int, detail: str, retry_after: Optional[int] = None):
+    body = orjson.dumps({"detail": detail})
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionControlMiddleware:
+    """ASGI middleware passing expensive endpoints through their AdmissionGate"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        gate = admission.gate_for(scope) if scope["type"] == "http" and ADMISSION_CONTROL else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        try:
+            body_bytes = int(headers[b"content-length"])
+        except (KeyError, ValueError):
+            body_bytes = None
+        if gate.max_body_bytes and body_bytes is not None and body_bytes > gate.max_body_bytes:
+            ADMISSION_REJECTIONS.inc(endpoint=gate.name, reason="body_too_large")
+            await _send_rejection(send, 413, f"Request body is limited to {gate.max_body_bytes // MB}MB")
+            return
+
+        # Bodies of unknown length are budgeted at the limit
+        memory = gate.memory_needed(gate.max_body_bytes if body_bytes is None else body_bytes)
+        reason = await admission.acquire(gate, memory)
+        if reason is not None:
+            ADMISSION_REJECTIONS.inc(endpoint=gate.name, reason=reason)
+            await _send_rejection(send, 429 if reason == "queue_full" else 503,
+                                  "Server is at capacity, please retry later", gate.retry_after())
+            return
+
+        # Without a Content-Length the limit is enforced as the body streams in
+        received = {"bytes": 0, "too_large": False}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and gate.max_body_bytes:
+                received["bytes"] += len(message.get("body", b""))
+                if received["bytes"] > gate.max_body_bytes:
+                    received["too_large"] = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_wrapper(message):
+            if not received["too_large"]:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                # Replace whatever error the truncated body caused
+                ADMISSION_REJECTIONS.inc(endpoint=gate.name, reason="body_too_large")
+                await _send_rejection(send, 413, f"Request body is limited to {gate.max_body_bytes // MB}MB")
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            gate.record(time.perf_counter() - started)
+            await admission.release(gate, memory)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    event_listeners=[MongoCommandMetrics()] if METRICS_ENABLED else []
+)
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
@@ -38,21 +698,19 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
 # Pydantic Models
 class AIProviderConfig(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    provider: str  # 'openai', 'anthropic', 'google'
+    provider: str  # 'openai', 'anthropic', 'google', 'openai-compatible'
     api_key: str
     model: str
     max_tokens: int = 4000
     temperature: float = 0.7
+    base_url: Optional[str] = None  # required for 'openai-compatible'
+    # Connection pool overrides; the adapter's defaults apply when unset
+    max_connections: Optional[int] = None
+    max_keepalive_connections: Optional[int] = None
+    request_timeout: Optional[float] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = True
 
@@ -62,6 +720,10 @@ class AIProviderConfigCreate(BaseModel):
     model: str
     max_tokens: int = 4000
     temperature: float = 0.7
+    base_url: Optional[str] = None
+    max_connections: Optional[int] = None
+    max_keepalive_connections: Optional[int] = None
+    request_timeout: Optional[float] = None
 
 class TestCase(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -75,6 +737,8 @@ class TestCase(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     is_selected: bool = False
+    requirement_id: Optional[str] = None  # set by batch generation
+    batch_id: Optional[str] = None
 
 class TestCaseCreate(BaseModel):
     title: str
@@ -101,6 +765,81 @@ class TestCaseGenerationRequest(BaseModel):
     requirements: Optional[str] = ""
     test_type: str = "Functional"
     num_test_cases: int = 5
+    selected_transcripts: Optional[List[str]] = []
+    selected_alm: Optional[str] = ""
+    selected_alm_items: Optional[List[str]] = []  # item keys, e.g. "PROJ-123"
+    use_transcript_digests: bool = True
+
+class ALMConfigSummary(BaseModel):
+    """An ALM configuration without its credentials, as the API returns it"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    alm_type: str  # 'jira'
+    base_url: str
+    username: str = ""
+    project_key: Optional[str] = None
+    jql: Optional[str] = None  # extra filter ANDed into the sync query
+    page_size: int = 100
+    max_concurrency: int = 4  # requests in flight during a sync or push
+    max_connections: Optional[int] = None
+    request_timeout: Optional[float] = None
+    push_issue_type: str = "Test"  # issue type test cases are created as
+    push_batch_size: int = 50
+    sync_watermark: Optional[datetime] = None  # newest item update seen, in UTC
+    last_synced_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    is_active: bool = True
+
+class ALMConfig(ALMConfigSummary):
+    api_token: str  # only read server-side, to build connectors
+
+class ALMConfigCreate(BaseModel):
+    alm_type: str
+    base_url: str
+    username: str = ""
+    api_token: str
+    project_key: Optional[str] = None
+    jql: Optional[str] = None
+    page_size: int = 100
+    max_concurrency: int = 4
+    max_connections: Optional[int] = None
+    request_timeout: Optional[float] = None
+    push_issue_type: str = "Test"
+    push_batch_size: int = 50
+
+class ALMItem(BaseModel):
+    id: str  # "<config id>:<key>"
+    config_id: str
+    alm_type: str
+    key: str
+    title: str
+    description: str = ""
+    item_type: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    labels: List[str] = []
+    url: Optional[str] = None
+    updated_at: Optional[datetime] = None  # as reported by the ALM, in UTC
+    synced_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ALMPushMapping(BaseModel):
+    id: str  # the idempotency key, also written to the ALM item as a label
+    test_case_id: str
+    alm_type: str
+    config_id: str
+    status: str  # 'pending' (outcome unknown), 'pushed' or 'failed'
+    alm_key: Optional[str] = None
+    alm_id: Optional[str] = None
+    error: Optional[str] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ALMPushRequest(BaseModel):
+    test_case_ids: Optional[List[str]] = None  # defaults to every selected test case
+
+class BatchRequirement(BaseModel):
+    id: str
+    requirement: str
+    test_type: str = "Functional"
+    num_test_cases: int = 5
 
 class Project(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -116,9 +855,14 @@ class ProjectCreate(BaseModel):
 class Transcript(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
-    content: str
+    content: str  # only a preview in list responses, see content_truncated
     meeting_date: Optional[str] = None
     participants: Optional[str] = None
+    content_size: Optional[int] = None  # characters in the full body
+    content_truncated: bool = False
+    digest: Optional[str] = None  # only in detail responses
+    digest_status: Optional[str] = None  # 'pending', 'running', 'ready', 'skipped' or 'failed'
+    digest_method: Optional[str] = None  # 'llm' or 'extractive'
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -128,52 +872,1001 @@ class TranscriptCreate(BaseModel):
     meeting_date: Optional[str] = None
     participants: Optional[str] = None
 
-# AI Provider Management
-class AIProviderManager:
+# Fast list serialization
+# List endpoints skip building a model per document (and FastAPI's second
+# validation pass through response_model): Mongo projects exactly the model's
+# fields, missing fields get the model's defaults and orjson encodes the rest.
+class ModelProjection:
+    """Mongo projection and default values matching a response model's schema"""
+
+    def __init__(self, model: type):
+        fields = model.model_fields
+        self.projection = {"_id": 0, **{name: 1 for name in fields}}
+        self.field_count = len(fields)
+        self.defaults = {
+            name: field.default
+            for name, field in fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+
+    def complete(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if len(doc) == self.field_count:
+            return doc
+        return {**self.defaults, **doc}
+
+def serialize_documents(docs: List[Dict[str, Any]], projection: ModelProjection) -> bytes:
+    return orjson.dumps([projection.complete(doc) for doc in docs])
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+def conditional_json_response(request: Optional[Request], content: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response tagged with a content hash ETag; 304 if the client already has it"""
+    headers = dict(headers or {})
+    headers["ETag"] = f'W/"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    if request is not None and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
+
+def fast_json_response(docs: List[Dict[str, Any]], projection: ModelProjection,
+                       request: Optional[Request] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Serialize projected raw documents straight to a JSON response"""
+    return conditional_json_response(request, serialize_documents(docs, projection), headers)
+
+AI_PROVIDER_PROJECTION = ModelProjection(AIProviderConfig)
+TEST_CASE_PROJECTION = ModelProjection(TestCase)
+TRANSCRIPT_PROJECTION = ModelProjection(Transcript)
+ALM_CONFIG_PROJECTION = ModelProjection(ALMConfigSummary)
+ALM_ITEM_PROJECTION = ModelProjection(ALMItem)
+ALM_PUSH_MAPPING_PROJECTION = ModelProjection(ALMPushMapping)
+
+# Transcript storage
+# Bodies below TRANSCRIPT_COMPRESS_THRESHOLD bytes stay inline as plain text.
+# Larger ones are compressed into content_blob, and compressed bodies of
+# TRANSCRIPT_GRIDFS_THRESHOLD bytes or more move to GridFS. Every document
+# keeps a short content_preview, so listing never reads or decompresses bodies.
+TRANSCRIPT_COMPRESSION = os.environ.get('TRANSCRIPT_COMPRESSION', 'zstd').lower()  # 'zstd', 'gzip' or 'none'
+if TRANSCRIPT_COMPRESSION not in ('zstd', 'gzip', 'none'):
+    # Fail at startup rather than on every transcript large enough to compress
+    raise ValueError(f"TRANSCRIPT_COMPRESSION must be 'zstd', 'gzip' or 'none', not {TRANSCRIPT_COMPRESSION!r}")
+TRANSCRIPT_COMPRESS_THRESHOLD = int(os.environ.get('TRANSCRIPT_COMPRESS_THRESHOLD', '4096'))
+TRANSCRIPT_GRIDFS_THRESHOLD = int(os.environ.get('TRANSCRIPT_GRIDFS_THRESHOLD', str(1024 * 1024)))
+TRANSCRIPT_PREVIEW_CHARS = 500
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6)
+    raise ValueError(f"Unknown transcript encoding: {encoding}")
+
+def _decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown transcript encoding: {encoding}")
+
+# List responses carry content_preview in place of the body
+TRANSCRIPT_LIST_PROJECTION = {
+    **{key: value for key, value in TRANSCRIPT_PROJECTION.projection.items()
+       if key not in ("content", "content_truncated", "digest")},
+    "content_preview": 1,
+}
+
+# Everything but the body fields, for lookups that load the body separately
+TRANSCRIPT_BODY_EXCLUDED = {"_id": 0, "content_preview": 0}
+
+# Metadata and digest only, for lookups that may not need the body at all
+TRANSCRIPT_BODY_OMITTED = {**TRANSCRIPT_BODY_EXCLUDED, "content": 0, "content_blob": 0}
+
+class TranscriptStore:
+    """Reads and writes transcripts, keeping large bodies compressed or in GridFS"""
+
+    def __init__(self, database):
+        self.db = database
+        self.bodies = AsyncIOMotorGridFSBucket(database, bucket_name="transcript_bodies")
+
+    async def encode_body(self, transcript_id: str, content: str) -> Dict[str, Any]:
+        """Storage fields for a transcript body"""
+        fields = {
+            "content_preview": content[:TRANSCRIPT_PREVIEW_CHARS],
+            "content_size": len(content),
+        }
+        raw = content.encode('utf-8')
+        if TRANSCRIPT_COMPRESSION == 'none' or len(raw) < TRANSCRIPT_COMPRESS_THRESHOLD:
+            fields["content"] = content
+            return fields
+        
+        blob = await asyncio.to_thread(_compress, raw, TRANSCRIPT_COMPRESSION)
+        fields["content_encoding"] = TRANSCRIPT_COMPRESSION
+        if len(blob) >= TRANSCRIPT_GRIDFS_THRESHOLD:
+            fields["content_file_id"] = await self.bodies.upload_from_stream(
+                transcript_id, blob, metadata={"encoding": TRANSCRIPT_COMPRESSION})
+        else:
+            fields["content_blob"] = blob
+        return fields
+
+    async def insert(self, transcript: Transcript):
+        transcript.content_size = len(transcript.content)
+        doc = transcript.dict(exclude={"content", "content_truncated"})
+        doc.update(await self.encode_body(transcript.id, transcript.content))
+        await self.db.transcripts.insert_one(doc)
+
+    async def load_body(self, doc: Dict[str, Any]) -> str:
+        """Return the full body of a stored transcript document"""
+        encoding = doc.get("content_encoding")
+        if not encoding:
+            return doc.get("content", "")
+        if doc.get("content_file_id") is not None:
+            stream = await self.bodies.open_download_stream(doc["content_file_id"])
+            blob = await stream.read()
+        else:
+            blob = doc["content_blob"]
+        data = await asyncio.to_thread(_decompress, blob, encoding)
+        return data.decode('utf-8')
+
+    def _to_transcript(self, doc: Dict[str, Any], content: str) -> Transcript:
+        fields = {key: value for key, value in doc.items() if key in Transcript.model_fields}
+        fields.update(content=content, content_size=len(content))
+        return Transcript(**fields)
+
+    async def list_previews(self, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Newest transcripts as raw documents whose content is the preview"""
+        docs = await self.db.transcripts.find({}, TRANSCRIPT_LIST_PROJECTION).sort("created_at", -1).to_list(limit)
+        
+        # Documents written before previews existed until migrate() has run
+        legacy_ids = [doc["id"] for doc in docs if "content_preview" not in doc]
+        legacy_bodies = {}
+        if legacy_ids:
+            async for doc in self.db.transcripts.find({"id": {"$in": legacy_ids}}, {"_id": 0, "id": 1, "content": 1}):
+                legacy_bodies[doc["id"]] = doc.get("content", "")
+        
+        for doc in docs:
+            if "content_preview" in doc:
+                doc["content"] = doc.pop("content_preview")
+            else:
+                body = legacy_bodies.get(doc["id"], "")
+                doc["content"] = body[:TRANSCRIPT_PREVIEW_CHARS]
+                doc["content_size"] = len(body)
+            doc["content_truncated"] = (doc.get("content_size") or 0) > TRANSCRIPT_PREVIEW_CHARS
+        return docs
+
+    async def get(self, transcript_id: str) -> Optional[Transcript]:
+        doc = await self.db.transcripts.find_one({"id": transcript_id}, TRANSCRIPT_BODY_EXCLUDED)
+        if not doc:
+            return None
+        return self._to_transcript(doc, await self.load_body(doc))
+
+    async def prompt_texts(self, transcript_ids: List[str], use_digests: bool = True) -> List[Dict[str, Any]]:
+        """Title and prompt text per transcript: the digest when one is ready, else the full body"""
+        query = {"id": {"$in": transcript_ids}}
+        projection = TRANSCRIPT_BODY_OMITTED if use_digests else TRANSCRIPT_BODY_EXCLUDED
+        docs = await self.db.transcripts.find(query, projection).to_list(100)
+        
+        def has_digest(doc):
+            return use_digests and doc.get("digest_status") == "ready" and bool(doc.get("digest"))
+        
+        # Bodies are fetched only for transcripts without a ready digest
+        missing = [doc["id"] for doc in docs if not has_digest(doc)]
+        if use_digests and missing:
+            with_bodies = await self.db.transcripts.find(
+                {"id": {"$in": missing}}, TRANSCRIPT_BODY_EXCLUDED).to_list(len(missing))
+            by_id = {doc["id"]: doc for doc in with_bodies}
+            # A transcript deleted between the two queries is dropped
+            docs = [doc if has_digest(doc) else by_id.get(doc["id"]) for doc in docs]
+            docs = [doc for doc in docs if doc is not None]
+        
+        async def prompt_text(doc):
+            if has_digest(doc):
+                return {"id": doc["id"], "title": doc["title"], "text": doc["digest"], "digest": True}
+            return {"id": doc["id"], "title": doc["title"], "text": await self.load_body(doc), "digest": False}
+        return list(await asyncio.gather(*(prompt_text(doc) for doc in docs)))
+
+    async def delete(self, transcript_id: str) -> bool:
+        doc = await self.db.transcripts.find_one_and_delete(
+            {"id": transcript_id}, {"_id": 0, "content_file_id": 1})
+        if doc is None:
+            return False
+        if doc.get("content_file_id") is not None:
+            try:
+                await self.bodies.delete(doc["content_file_id"])
+            except NoFile:
+                pass
+        return True
+
+    async def migrate(self, batch_size: int = 100) -> Dict[str, int]:
+        """Re-encode transcripts stored before previews, compression and GridFS offloading"""
+        counts = {"migrated": 0, "compressed": 0, "offloaded": 0}
+        cursor = self.db.transcripts.find(
+            {"content_preview": {"$exists": False}}, {"_id": 1, "id": 1, "content": 1}, batch_size=batch_size)
+        async for doc in cursor:
+            fields = await self.encode_body(doc["id"], doc.get("content", ""))
+            update = {"$set": fields}
+            if "content" not in fields:
+                update["$unset"] = {"content": ""}
+            await self.db.transcripts.update_one({"_id": doc["_id"]}, update)
+            counts["migrated"] += 1
+            counts["compressed"] += "content_encoding" in fields
+            counts["offloaded"] += "content_file_id" in fields
+        return counts
+
+transcript_store = TranscriptStore(db)
+
+# AI Provider Adapters
+# Prompts put everything that repeats across calls (instructions, then the
+# selected files/transcripts/ALM items) in the system prompt and the per-call
+# request in the user prompt, so providers can serve the shared prefix from
+# their prompt cache. PROMPT_CACHING marks it cacheable where that is opt-in.
+PROMPT_CACHING = os.environ.get('PROMPT_CACHING', 'true').lower() not in ('0', 'false', 'no')
+
+def prompt_cache_key(system_prompt: str) -> str:
+    """Routing hint so calls sharing a system prompt land on the same provider cache"""
+    return "genstudio-" + hashlib.blake2b(system_prompt.encode(), digest_size=12).hexdigest()
+
+class ProviderResult(BaseModel):
+    content: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cached_tokens: Optional[int] = None  # prompt tokens read from the provider's prompt cache
+
+PROVIDER_ADAPTERS: Dict[str, type] = {}
+
+def register_provider(name: str):
+    """Class decorator registering a ProviderAdapter under a provider name"""
+    def decorator(cls):
+        cls.name = name
+        PROVIDER_ADAPTERS[name] = cls
+        return cls
+    return decorator
+
+class ProviderAdapter:
+    """Async interface every AI provider adapter implements"""
+    name = ""
+    sdk_module = ""  # imported lazily; named here so warm_up() can preload it
+    default_max_connections = 100
+    default_max_keepalive_connections = 20
+    default_timeout = 600.0
+
+    def __init__(self, config: AIProviderConfig):
+        self.validate_config(config)
+        self.config = config
+
+    @classmethod
+    def validate_config(cls, config: AIProviderConfig):
+        """Reject configurations this adapter cannot work with"""
+        pass
+
+    @property
+    def timeout(self) -> float:
+        return self.config.request_timeout or self.default_timeout
+
+    def http_client(self, sdk) -> Any:
+        """Pooled async HTTP client for an SDK, honouring the config's connection pool settings"""
+        # Build on the SDK's own client and limits classes so its transport defaults are kept
+        limits_cls = type(sdk.DEFAULT_CONNECTION_LIMITS)
+        return sdk.DefaultAsyncHttpxClient(
+            limits=limits_cls(
+                max_connections=self.config.max_connections or self.default_max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections or self.default_max_keepalive_connections,
+            ),
+            timeout=self.timeout,
+        )
+
+    async def generate(self, system_prompt: str, user_prompt: str) -> ProviderResult:
+        raise NotImplementedError
+
+    async def stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield
+
+    async def aclose(self):
+        pass
+
+@register_provider("openai")
+class OpenAIAdapter(ProviderAdapter):
+    """OpenAI caches prompt prefixes of 1024+ tokens automatically"""
+    sdk_module = "openai"
+    send_prompt_cache_key = True
+
+    def __init__(self, config: AIProviderConfig):
+        super().__init__(config)
+        import openai
+        self.client = openai.AsyncOpenAI(
+            api_key=config.api_key,
+            base_url=config.base_url or None,
+            timeout=self.timeout,
+            http_client=self.http_client(openai),
+        )
+
+    def _request(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        request = dict(
+            model=self.config.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature
+        )
+        # Only the OpenAI API itself is known to accept prompt_cache_key
+        if PROMPT_CACHING and self.send_prompt_cache_key and not self.config.base_url:
+            request["extra_body"] = {"prompt_cache_key": prompt_cache_key(system_prompt)}
+        return request
+
+    async def generate(self, system_prompt: str, user_prompt: str) -> ProviderResult:
+        response = await self.client.chat.completions.create(**self._request(system_prompt, user_prompt))
+        usage = response.usage
+        details = getattr(usage, "prompt_tokens_details", None)
+        return ProviderResult(
+            content=response.choices[0].message.content or "",
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
+            cached_tokens=getattr(details, "cached_tokens", None),
+        )
+
+    async def stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        response = await self.client.chat.completions.create(**self._request(system_prompt, user_prompt), stream=True)
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def aclose(self):
+        await self.client.close()
+
+@register_provider("openai-compatible")
+class OpenAICompatibleAdapter(OpenAIAdapter):
+    """Self-hosted servers exposing the OpenAI chat completions API (vLLM, llama.cpp, ...)"""
+    # Local inference servers batch a bounded number of sequences, so keep the pool small
+    default_max_connections = 16
+    default_max_keepalive_connections = 16
+    # Their prefix caching (e.g. vLLM --enable-prefix-caching) needs no request flag
+    send_prompt_cache_key = False
+
+    @classmethod
+    def validate_config(cls, config: AIProviderConfig):
+        if not config.base_url:
+            raise HTTPException(status_code=400, detail="base_url is required for openai-compatible providers")
+
+@register_provider("anthropic")
+class AnthropicAdapter(ProviderAdapter):
+    """Anthropic caches a prompt prefix only up to an explicit cache_control breakpoint"""
+    sdk_module = "anthropic"
+
+    def __init__(self, config: AIProviderConfig):
+        super().__init__(config)
+        import anthropic
+        self.client = anthropic.AsyncAnthropic(
+            api_key=config.api_key,
+            base_url=config.base_url or None,
+            timeout=self.timeout,
+            http_client=self.http_client(anthropic),
+        )
+
+    def _request(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        system = {"type": "text", "text": system_prompt}
+        if PROMPT_CACHING:
+            # Prompts shorter than the model's minimum cacheable length are simply not cached
+            system["cache_control"] = {"type": "ephemeral"}
+        return dict(
+            model=self.config.model,
+            max_tokens=self.config.max_tokens,
+            temperature=self.config.temperature,
+            system=[system],
+            messages=[
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+
+    async def generate(self, system_prompt: str, user_prompt: str) -> ProviderResult:
+        response = await self.client.messages.create(**self._request(system_prompt, user_prompt))
+        usage = response.usage
+        # input_tokens excludes the tokens read from or written to the cache
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        return ProviderResult(
+            content=response.content[0].text,
+            prompt_tokens=usage.input_tokens + cache_read + cache_write,
+            completion_tokens=usage.output_tokens,
+            cached_tokens=cache_read,
+        )
+
+    async def stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        async with self.client.messages.stream(**self._request(system_prompt, user_prompt)) as response:
+            async for text in response.text_stream:
+                yield text
+
+    async def aclose(self):
+        await self.client.close()
+
+@register_provider("google")
+class GoogleAdapter(ProviderAdapter):
+    """Gemini over the google.generativeai gRPC transport, which manages its own channel pool
+
+    Gemini 2.5 models cache repeated prompt prefixes implicitly.
+    """
+    sdk_module = "google.generativeai"
+
+    def __init__(self, config: AIProviderConfig):
+        super().__init__(config)
+        import google.generativeai as genai
+        genai.configure(api_key=config.api_key)
+        self.genai = genai
+        self.model = genai.GenerativeModel(config.model)
+
+    def _generation_config(self):
+        return self.genai.types.GenerationConfig(
+            max_output_tokens=self.config.max_tokens,
+            temperature=self.config.temperature,
+        )
+
+    async def generate(self, system_prompt: str, user_prompt: str) -> ProviderResult:
+        response = await self.model.generate_content_async(
+            f"{system_prompt}\n\n{user_prompt}",
+            generation_config=self._generation_config(),
+            request_options={"timeout": self.timeout},
+        )
+        usage = getattr(response, "usage_metadata", None)
+        return ProviderResult(
+            content=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", None),
+            completion_tokens=getattr(usage, "candidates_token_count", None),
+            cached_tokens=getattr(usage, "cached_content_token_count", None),
+        )
+
+    async def stream(self, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
+        response = await self.model.generate_content_async(
+            f"{system_prompt}\n\n{user_prompt}",
+            generation_config=self._generation_config(),
+            request_options={"timeout": self.timeout},
+            stream=True,
+        )
+        async for chunk in response:
+            yield chunk.text
+
+# Token budget
+# All provider calls share one tokens-per-minute budget (LLM_TOKENS_PER_MINUTE,
+# 0 disables it). A call reserves its estimated prompt tokens plus max_tokens,
+# as provider rate limiters do, and the reservation is settled against the
+# usage the provider reports.
+LLM_TOKENS_PER_MINUTE = int(os.environ.get('LLM_TOKENS_PER_MINUTE', '0'))
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+class TokenBudget:
+    """Token bucket refilled continuously at tokens_per_minute"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        # Waiters queue on the lock, so reservations are granted in order
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    async def acquire(self, tokens: int) -> int:
+        """Wait until tokens fit in the budget; return the amount reserved"""
+        if not self.capacity:
+            return 0
+        tokens = min(tokens, self.capacity)
+        started = time.perf_counter()
+        async with self.lock:
+            self._refill()
+            while self.available < tokens:
+                await asyncio.sleep((tokens - self.available) * 60 / self.capacity)
+                self._refill()
+            self.available -= tokens
+        TOKEN_BUDGET_WAIT_SECONDS.observe(time.perf_counter() - started)
+        return tokens
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Return unused tokens, or charge the overrun, once usage is known"""
+        if not self.capacity or used is None:
+            return
+        self._refill()
+        self.available = min(self.capacity, self.available + reserved - used)
+
+token_budget = TokenBudget(LLM_TOKENS_PER_MINUTE)
+
+# ALM Connectors
+# Connectors pull work items from an ALM into the alm_items collection. Syncs
+# are incremental: each one asks for items updated since the newest update the
+# previous sync saw, so generation reads selected items from the cache rather
+# than calling the ALM.
+ALM_SYNC_INTERVAL_SECONDS = int(os.environ.get('ALM_SYNC_INTERVAL_SECONDS', '0'))  # 0 disables background syncs
+# Re-fetch window covering the ALM's query granularity and items updated mid-sync
+ALM_SYNC_OVERLAP = timedelta(minutes=1)
+# Searches re-run when results shifted while their pages were being fetched
+ALM_SYNC_MAX_PASSES = 3
+ALM_CONTEXT_MAX_CHARS = 4000  # per item description in the prompt
+# Attempts for requests answered with 429/503; waits honour Retry-After,
+# otherwise back off exponentially with jitter
+ALM_MAX_ATTEMPTS = 5
+ALM_RETRY_STATUSES = (429, 502, 503, 504)
+# Creates are only retried when the ALM cannot have processed them: a gateway
+# error may arrive after the items were created, so those are left pending
+# for the idempotency key lookup instead
+ALM_CREATE_RETRY_STATUSES = (429, 503)
+ALM_MAX_BACKOFF_SECONDS = 30.0
+
+ALM_CONNECTORS: Dict[str, type] = {}
+
+def register_alm_connector(name: str):
+    """Class decorator registering an ALMConnector under an ALM type"""
+    def decorator(cls):
+        cls.name = name
+        ALM_CONNECTORS[name] = cls
+        return cls
+    return decorator
+
+class ALMConnector:
+    """Async interface every ALM connector implements"""
+    name = ""
+    default_max_connections = 10
+    default_timeout = 30.0
+
+    def __init__(self, config: ALMConfig):
+        self.validate_config(config)
+        self.config = config
+
+    @classmethod
+    def validate_config(cls, config: ALMConfig):
+        """Reject configurations this connector cannot work with"""
+        if not config.base_url:
+            raise HTTPException(status_code=400, detail=f"base_url is required for {cls.name}")
+
+    async def fetch_items(self, since: Optional[datetime]) -> AsyncIterator[List[ALMItem]]:
+        """Yield pages of items updated at or after since (UTC), or all items if since is None"""
+        raise NotImplementedError
+        yield
+
+    async def push_test_cases(self, test_cases: List[Dict[str, Any]], idempotency_keys: List[str]) -> List[Dict[str, Any]]:
+        """Create one ALM item per test case in a single batch call.
+
+        Returns a result per test case: {"status": "pushed", "alm_key", "alm_id"},
+        {"status": "failed", "error"} or {"status": "pending"} if the outcome is unknown.
+        """
+        raise NotImplementedError
+
+    async def find_by_idempotency_keys(self, idempotency_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Items created by earlier pushes, keyed by idempotency key"""
+        raise NotImplementedError
+
+    async def aclose(self):
+        pass
+
+def idempotency_key(config: ALMConfig, test_case_id: str) -> str:
+    """Stable per ALM project and test case, so re-created configurations reuse it"""
+    scope = f"{config.alm_type}|{config.base_url.rstrip('/')}|{config.project_key}|{test_case_id}"
+    return "genstudio-" + hashlib.sha1(scope.encode()).hexdigest()[:20]
+
+def retry_delay(response: Any, attempt: int) -> float:
+    """Seconds to wait before retrying a rate limited or unavailable response"""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), ALM_MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(ALM_MAX_BACKOFF_SECONDS, 0.5 * 2 ** attempt))
+
+def parse_jira_datetime(value: Optional[str]) -> Optional[datetime]:
+    """JIRA timestamps like 2024-05-01T10:20:30.000+0000 as naive UTC"""
+    if not value:
+        return None
+    try:
+        return as_naive_utc(datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z"))
+    except ValueError:
+        return None
+
+@register_alm_connector("jira")
+class JiraConnector(ALMConnector):
+    search_path = "/rest/api/2/search"
+    bulk_create_path = "/rest/api/2/issue/bulk"
+    fields = "summary,description,issuetype,status,priority,labels,updated"
+
+    def __init__(self, config: ALMConfig):
+        super().__init__(config)
+        import httpx
+        self.httpx = httpx
+        self.base_url = config.base_url.rstrip('/')
+        max_connections = config.max_connections or self.default_max_connections
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=(config.username, config.api_token),
+            headers={"Accept": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=config.request_timeout or self.default_timeout,
+        )
+        self.page_slots = asyncio.Semaphore(max(1, config.max_concurrency))
+        self.timezone = None
+
+    async def send(self, method: str, path: str, retry_statuses=ALM_RETRY_STATUSES, **kwargs) -> Any:
+        """Send a request, retrying rate limited and unavailable responses"""
+        for attempt in range(ALM_MAX_ATTEMPTS):
+            async with self.page_slots:
+                response = await self.client.request(method, path, **kwargs)
+            if response.status_code not in retry_statuses or attempt == ALM_MAX_ATTEMPTS - 1:
+                return response
+            ALM_REQUEST_RETRIES.inc(alm_type=self.name, status=str(response.status_code))
+            # Wait outside page_slots so other requests keep the connections busy
+            await asyncio.sleep(retry_delay(response, attempt))
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        response = await self.send("GET", path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    async def user_timezone(self):
+        """JQL dates are read in the API user's profile timezone"""
+        if self.timezone is None:
+            try:
+                profile = await self.get_json("/rest/api/2/myself")
+                self.timezone = ZoneInfo(profile.get("timeZone") or "UTC")
+            except (self.httpx.HTTPError, ValueError, ZoneInfoNotFoundError) as e:
+                logger.warning(f"Could not read the JIRA user's timezone, assuming UTC: {e}")
+                self.timezone = timezone.utc
+        return self.timezone
+
+    async def build_jql(self, since: Optional[datetime]) -> str:
+        clauses = []
+        if self.config.project_key:
+            clauses.append(f'project = "{self.config.project_key}"')
+        if self.config.jql:
+            clauses.append(f"({self.config.jql})")
+        if since is not None:
+            local_since = since.replace(tzinfo=timezone.utc).astimezone(await self.user_timezone())
+            clauses.append(f'updated >= "{local_since:%Y-%m-%d %H:%M}"')
+        # Pages are fetched by offset, so the order must not change when an issue
+        # is edited mid-sync; the watermark comes from the items' updated times
+        return " AND ".join(clauses) + " ORDER BY key ASC"
+
+    def to_item(self, issue: Dict[str, Any]) -> ALMItem:
+        fields = issue.get("fields") or {}
+        return ALMItem(
+            id=f"{self.config.id}:{issue['key']}",
+            config_id=self.config.id,
+            alm_type=self.name,
+            key=issue["key"],
+            title=fields.get("summary") or "",
+            description=fields.get("description") or "",
+            item_type=(fields.get("issuetype") or {}).get("name"),
+            status=(fields.get("status") or {}).get("name"),
+            priority=(fields.get("priority") or {}).get("name"),
+            labels=fields.get("labels") or [],
+            url=f"{self.base_url}/browse/{issue['key']}",
+            updated_at=parse_jira_datetime(fields.get("updated")),
+        )
+
+    async def search_pages(self, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Every page of one search, the first alone and the rest concurrently"""
+        first = await self.get_json(self.search_path, {**params, "startAt": 0})
+        yield first
+        
+        # The first page tells the total and the page size the server honours;
+        # the remaining pages are fetched concurrently, bounded by page_slots
+        page_size = first.get("maxResults") or len(first.get("issues", []))
+        if not page_size:
+            return
+        pages = [
+            asyncio.create_task(self.get_json(self.search_path, {**params, "startAt": start}))
+            for start in range(page_size, first.get("total", 0), page_size)
+        ]
+        try:
+            for next_page in asyncio.as_completed(pages):
+                yield await next_page
+        finally:
+            for task in pages:
+                task.cancel()
+
+    async def fetch_items(self, since: Optional[datetime]) -> AsyncIterator[List[ALMItem]]:
+        params = {"jql": await self.build_jql(since), "fields": self.fields, "maxResults": self.config.page_size}
+        for _ in range(ALM_SYNC_MAX_PASSES):
+            totals = set()
+            seen = set()
+            async for page in self.search_pages(params):
+                totals.add(page.get("total", 0))
+                items = [self.to_item(issue) for issue in page.get("issues", [])]
+                seen.update(item.key for item in items)
+                yield items
+            # Edits leave the key order alone, but an issue created, deleted or
+            # newly matching the JQL mid-search shifts the offsets of pages
+            # fetched after it, so another issue can fall between two pages.
+            # Every slot was fetched, so that shows up as a changed total or a
+            # key seen twice.
+            if len(totals) <= 1 and len(seen) >= max(totals, default=0):
+                return
+            logger.info(f"JIRA search results shifted during the sync ({len(seen)} of {max(totals)}); searching again")
+        # Failing keeps the watermark where it was, so the next sync covers the gap
+        raise RuntimeError("JIRA search results kept changing during the sync; try again")
+
+    def issue_fields(self, test_case: Dict[str, Any], key: str) -> Dict[str, Any]:
+        steps = "\n".join(f"# {step}" for step in test_case.get("steps") or [])
+        description = "\n\n".join([
+            test_case.get("description") or "",
+            f"*Preconditions:*\n{test_case.get('preconditions') or ''}",
+            f"*Steps:*\n{steps}",
+            f"*Expected result:*\n{test_case.get('expected_result') or ''}",
+            f"*Priority:* {test_case.get('priority') or ''}",
+        ])
+        labels = ["genstudio", key]
+        if test_case.get("category"):
+            labels.append(test_case["category"].lower().replace(" ", "-"))
+        return {
+            "project": {"key": self.config.project_key},
+            "summary": test_case["title"][:255],
+            "description": description,
+            "issuetype": {"name": self.config.push_issue_type},
+            "labels": labels,
+        }
+
+    async def push_test_cases(self, test_cases: List[Dict[str, Any]], idempotency_keys: List[str]) -> List[Dict[str, Any]]:
+        payload = {"issueUpdates": [
+            {"fields": self.issue_fields(test_case, key)} for test_case, key in zip(test_cases, idempotency_keys)
+        ]}
+        response = await self.send("POST", self.bulk_create_path, retry_statuses=ALM_CREATE_RETRY_STATUSES, json=payload)
+        # JIRA answers 201 when every issue was created and 400 when none were;
+        # either way "issues" lists the created ones in request order and
+        # "errors" the failed elements by index
+        if response.status_code not in (200, 201, 400):
+            response.raise_for_status()
+        body = response.json()
+        if response.status_code == 400 and "errors" not in body:
+            response.raise_for_status()
+        
+        failed = {error.get("failedElementNumber"): error for error in body.get("errors", [])}
+        created = iter(body.get("issues", []))
+        results = []
+        for index in range(len(test_cases)):
+            if index in failed:
+                errors = failed[index].get("elementErrors") or {}
+                results.append({"status": "failed", "error": json.dumps(errors)[:500]})
+                continue
+            issue = next(created, None)
+            if issue is None:
+                results.append({"status": "pending"})
+            else:
+                results.append({"status": "pushed", "alm_key": issue["key"], "alm_id": str(issue.get("id") or "")})
+        return results
+
+    async def find_by_idempotency_keys(self, idempotency_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        wanted = set(idempotency_keys)
+        chunks = [idempotency_keys[start:start + 50] for start in range(0, len(idempotency_keys), 50)]
+        pages = await asyncio.gather(*(
+            self.get_json(self.search_path, {
+                "jql": "labels in (" + ", ".join(f'"{key}"' for key in chunk) + ")",
+                "fields": "labels",
+                "maxResults": len(chunk),
+            })
+            for chunk in chunks
+        ))
+        for page in pages:
+            for issue in page.get("issues", []):
+                for label in (issue.get("fields") or {}).get("labels") or []:
+                    if label in wanted:
+                        found[label] = {"alm_key": issue["key"], "alm_id": str(issue.get("id") or "")}
+        return found
+
+    async def aclose(self):
+        await self.client.aclose()
+
+class ALMManager:
     def __init__(self):
-        self.providers = {}
-    
-    async def get_active_provider(self) -> Optional[AIProviderConfig]:
-        """Get the active AI provider configuration"""
-        config = await db.ai_configs.find_one({"is_active": True})
+        # Connectors keyed by config id so their HTTP connection pools are reused
+        self.connectors: Dict[str, ALMConnector] = {}
+        self.sync_locks: Dict[str, asyncio.Lock] = {}
+
+    def get_connector(self, config: ALMConfig) -> ALMConnector:
+        """Get (or create) the connector for an ALM configuration"""
+        connector = self.connectors.get(config.id)
+        if connector is None:
+            connector_cls = ALM_CONNECTORS.get(config.alm_type)
+            if connector_cls is None:
+                raise HTTPException(status_code=400, detail=f"Unsupported ALM system: {config.alm_type}")
+            connector = self.connectors[config.id] = connector_cls(config)
+        return connector
+
+    async def discard(self, config_id: str):
+        connector = self.connectors.pop(config_id, None)
+        if connector is not None:
+            await connector.aclose()
+
+    async def close(self):
+        """Close every connector's connection pool"""
+        for connector in self.connectors.values():
+            await connector.aclose()
+        self.connectors.clear()
+
+    async def get_active_config(self, alm_type: str) -> Optional[ALMConfig]:
+        config = await db.alm_configs.find_one({"alm_type": alm_type, "is_active": True})
         if config:
-            return AIProviderConfig(**config)
+            return ALMConfig(**config)
         return None
-    
-    async def generate_test_cases(self, request: TestCaseGenerationRequest, file_contents: List[str] = None) -> List[TestCase]:
-        """Generate test cases using the active AI provider"""
-        provider_config = await self.get_active_provider()
-        if not provider_config:
-            raise HTTPException(status_code=400, detail="No active AI provider configured")
+
+    async def sync(self, config: ALMConfig, full: bool = False) -> Dict[str, Any]:
+        """Upsert the items changed since the last sync (or all of them) into the cache"""
+        lock = self.sync_locks.setdefault(config.id, asyncio.Lock())
+        async with lock:
+            # Re-read under the lock: a sync that just finished moved the watermark
+            stored = await db.alm_configs.find_one({"id": config.id}, {"_id": 0, "sync_watermark": 1})
+            watermark = (stored or {}).get("sync_watermark")
+            since = None if full or watermark is None else watermark - ALM_SYNC_OVERLAP
+            mode = "full" if since is None else "incremental"
+            connector = self.get_connector(config)
+            started_at = datetime.utcnow()
+            
+            counts = {"fetched": 0, "inserted": 0, "updated": 0}
+            with trace_span("alm_sync", alm_type=config.alm_type, mode=mode) as span, \
+                    observe_duration(ALM_SYNC_SECONDS, alm_type=config.alm_type, mode=mode):
+                async for items in connector.fetch_items(since):
+                    if not items:
+                        continue
+                    result = await db.alm_items.bulk_write(
+                        [UpdateOne({"id": item.id}, {"$set": item.dict()}, upsert=True) for item in items],
+                        ordered=False,
+                    )
+                    counts["fetched"] += len(items)
+                    counts["inserted"] += result.upserted_count
+                    counts["updated"] += result.modified_count
+                    newest = max((item.updated_at for item in items if item.updated_at), default=None)
+                    if newest and (watermark is None or newest > watermark):
+                        watermark = newest
+                span.set(**counts)
+            ALM_ITEMS_SYNCED.inc(counts["fetched"], alm_type=config.alm_type)
+            # Items updated after the sync started may have been missed by it
+            if watermark is not None and watermark > started_at:
+                watermark = started_at
+            
+            synced_at = datetime.utcnow()
+            await db.alm_configs.update_one(
+                {"id": config.id},
+                {"$set": {"sync_watermark": watermark, "last_synced_at": synced_at}}
+            )
+            return {"mode": mode, **counts, "sync_watermark": watermark, "last_synced_at": synced_at}
+
+    async def record_push_results(self, config: ALMConfig, mappings: List[Dict[str, Any]]):
+        now = datetime.utcnow()
+        await db.alm_push_mappings.bulk_write([
+            UpdateOne({"id": mapping["id"]}, {"$set": {**mapping, "config_id": config.id, "updated_at": now}}, upsert=True)
+            for mapping in mappings
+        ], ordered=False)
+
+    async def push_batch(self, config: ALMConfig, connector: ALMConnector, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        keys = [idempotency_key(config, test_case["id"]) for test_case in batch]
+        try:
+            results = await connector.push_test_cases(batch, keys)
+        except Exception as e:
+            # A 4xx rejection created nothing; server errors, timeouts and dropped
+            # connections may have, so those stay pending for reconciliation
+            rejected = 400 <= getattr(getattr(e, "response", None), "status_code", 0) < 500
+            logger.warning(f"ALM push batch of {len(batch)} failed: {e}")
+            results = [{"status": "failed" if rejected else "pending", "error": str(e)[:500]} for _ in batch]
         
-        # Build context from files
-        context = ""
-        if file_contents:
-            context = "\n\n".join([f"File content:\n{content}" for content in file_contents])
+        mappings = [
+            {"id": key, "test_case_id": test_case["id"], "alm_type": config.alm_type,
+             "alm_key": None, "alm_id": None, "error": None, **result}
+            for test_case, key, result in zip(batch, keys, results)
+        ]
+        await self.record_push_results(config, mappings)
+        return mappings
+
+    async def push(self, config: ALMConfig, test_case_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Create ALM items for selected test cases, skipping those already pushed"""
+        if not config.project_key:
+            raise HTTPException(status_code=400, detail="A project key is required to push test cases")
+        connector = self.get_connector(config)
+        started = time.perf_counter()
         
-        # Add transcript context if provided
-        transcript_context = ""
-        if hasattr(request, 'selected_transcripts') and request.selected_transcripts:
-            transcript_docs = await db.transcripts.find({"id": {"$in": request.selected_transcripts}}).to_list(100)
-            if transcript_docs:
-                transcript_context = "\n\n".join([
-                    f"Meeting Transcript - {doc['title']}:\n{doc['content']}"
-                    for doc in transcript_docs
-                ])
+        query = {"is_selected": True}
+        if test_case_ids is not None:
+            query["id"] = {"$in": test_case_ids}
+        test_cases = await db.test_cases.find(query, TEST_CASE_PROJECTION.projection).to_list(None)
+        keys = {test_case["id"]: idempotency_key(config, test_case["id"]) for test_case in test_cases}
+        existing = {
+            mapping["id"]: mapping
+            async for mapping in db.alm_push_mappings.find({"id": {"$in": list(keys.values())}}, {"_id": 0})
+        }
+        counts = {"selected": len(test_cases), "skipped": 0, "reconciled": 0, "pushed": 0, "failed": 0, "pending": 0}
         
-        # Create the prompt
-        system_prompt = f"""You are an expert QA engineer specialized in creating comprehensive test cases. 
+        with trace_span("alm_push", alm_type=config.alm_type, selected=len(test_cases)) as span:
+            todo = []
+            unknown = []
+            for test_case in test_cases:
+                status = existing.get(keys[test_case["id"]], {}).get("status")
+                if status == "pushed":
+                    counts["skipped"] += 1
+                elif status == "pending":
+                    unknown.append(test_case)
+                else:
+                    todo.append(test_case)
+            
+            # Earlier pushes that may have created items without recording them
+            if unknown:
+                found = await connector.find_by_idempotency_keys([keys[test_case["id"]] for test_case in unknown])
+                reconciled = []
+                for test_case in unknown:
+                    match = found.get(keys[test_case["id"]])
+                    if match:
+                        reconciled.append({"id": keys[test_case["id"]], "test_case_id": test_case["id"],
+                                           "alm_type": config.alm_type, "status": "pushed", "error": None, **match})
+                    else:
+                        todo.append(test_case)
+                if reconciled:
+                    await self.record_push_results(config, reconciled)
+                counts["reconciled"] = len(reconciled)
+            
+            # Recorded as pending before sending, so a crash mid-push is reconciled next time
+            if todo:
+                await self.record_push_results(config, [
+                    {"id": keys[test_case["id"]], "test_case_id": test_case["id"], "alm_type": config.alm_type,
+                     "status": "pending"}
+                    for test_case in todo
+                ])
+            batch_size = max(1, config.push_batch_size)
+            batches = [todo[start:start + batch_size] for start in range(0, len(todo), batch_size)]
+            # Concurrency is bounded by the connector's request slots
+            for mappings in await asyncio.gather(*(self.push_batch(config, connector, batch) for batch in batches)):
+                for mapping in mappings:
+                    counts[mapping["status"]] += 1
+            span.set(**counts)
         
-Generate {request.num_test_cases} detailed test cases based on the following requirements:
+        for outcome in ("pushed", "failed", "pending"):
+            if counts[outcome]:
+                ALM_PUSHED_TEST_CASES.inc(counts[outcome], alm_type=config.alm_type, outcome=outcome)
+        return {**counts, "batches": len(batches), "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
 
-Requirements: {request.prompt}
-Test Type: {request.test_type}
+    async def sync_periodically(self, interval: int):
+        """Background loop syncing every active ALM configuration"""
+        while True:
+            await asyncio.sleep(interval)
+            async for doc in db.alm_configs.find({"is_active": True}, {"_id": 0}):
+                config = ALMConfig(**doc)
+                try:
+                    result = await self.sync(config)
+                    logger.info(f"ALM sync {config.alm_type} ({config.id}): {result['fetched']} items")
+                except Exception as e:
+                    logger.warning(f"ALM sync {config.alm_type} ({config.id}) failed: {e}")
 
-Context from uploaded files:
-{context}
+    async def load_context(self, alm_type: str, keys: List[str]) -> str:
+        """Prompt context built from cached items of the active configuration"""
+        if not alm_type or not keys:
+            return ""
+        config = await self.get_active_config(alm_type)
+        if config is None:
+            logger.warning(f"No active {alm_type} configuration; ignoring selected ALM items")
+            return ""
+        with trace_span("alm_lookup", requested=len(keys)) as span:
+            items = await db.alm_items.find(
+                {"config_id": config.id, "key": {"$in": keys}}, ALM_ITEM_PROJECTION.projection).to_list(len(keys))
+            span.set(found=len(items))
+        blocks = []
+        # Sorted so the prompt prefix does not depend on selection order
+        for item in sorted(items, key=lambda item: item["key"]):
+            details = ", ".join(value for value in (item.get("item_type"), item.get("status"), item.get("priority")) if value)
+            description = (item.get("description") or "")[:ALM_CONTEXT_MAX_CHARS]
+            blocks.append(f"{item['key']} - {item['title']} ({details}):\n{description}")
+        return "\n\n".join(blocks)
 
-Meeting transcripts context:
-{transcript_context}
+alm_manager = ALMManager()
+
+# AI Provider Management
+TEST_CASE_INSTRUCTIONS = """You are an expert QA engineer specialized in creating comprehensive test cases.
+
+You will be asked for a number of detailed test cases for a requirement and test type. Base them on the requirement and on the context below.
 
 For each test case, provide:
 1. Title - Clear, descriptive title
@@ -186,7 +1879,7 @@ For each test case, provide:
 
 Return the response as a JSON array of test cases with the exact structure:
 [
-  {{
+  {
     "title": "Test case title",
     "description": "Test case description",
     "preconditions": "Prerequisites for the test",
@@ -194,73 +1887,164 @@ Return the response as a JSON array of test cases with the exact structure:
     "expected_result": "Expected outcome",
     "priority": "Medium",
     "category": "Functional"
-  }}
+  }
 ]
 
 Make sure the test cases are realistic, actionable, and cover different scenarios including positive, negative, and edge cases."""
 
+class AIProviderManager:
+    def __init__(self):
+        # Adapters keyed by config id so their HTTP connection pools are reused
+        self.providers: Dict[str, ProviderAdapter] = {}
+    
+    def get_adapter(self, provider_config: AIProviderConfig) -> ProviderAdapter:
+        """Get (or create) the adapter for a provider configuration"""
+        adapter = self.providers.get(provider_config.id)
+        if adapter is None:
+            adapter_cls = PROVIDER_ADAPTERS.get(provider_config.provider)
+            if adapter_cls is None:
+                raise HTTPException(status_code=400, detail=f"Unsupported AI provider: {provider_config.provider}")
+            adapter = self.providers[provider_config.id] = adapter_cls(provider_config)
+        return adapter
+    
+    async def discard_inactive(self, active_id: str):
+        """Close the connection pools of adapters for configurations no longer active"""
+        for config_id in [config_id for config_id in self.providers if config_id != active_id]:
+            await self.providers.pop(config_id).aclose()
+    
+    async def close(self):
+        """Close every adapter's connection pool"""
+        for adapter in self.providers.values():
+            await adapter.aclose()
+        self.providers.clear()
+    
+    async def get_active_provider(self) -> Optional[AIProviderConfig]:
+        """Get the active AI provider configuration"""
+        config = await db.ai_configs.find_one({"is_active": True})
+        if config:
+            return AIProviderConfig(**config)
+        return None
+    
+    def build_system_prompt(self, request: TestCaseGenerationRequest, file_contents: Optional[List[str]],
+                            transcript_context: str, alm_context: str = "") -> str:
+        """Stable instructions, then the context shared by every request that selects it"""
+        # Build context from files
+        context = ""
+        if file_contents:
+            context = "\n\n".join([f"File content:\n{content}" for content in file_contents])
+        
+        alm_section = ""
+        if alm_context:
+            alm_section = f"""
+ALM work items context ({request.selected_alm}):
+{alm_context}
+"""
+        
+        # Nothing request-specific goes here, so the whole system prompt is a cacheable prefix
+        return f"""{TEST_CASE_INSTRUCTIONS}
+
+Context from uploaded files:
+{context}
+
+Meeting transcripts context:
+{transcript_context}
+{alm_section}"""
+    
+    def build_user_prompt(self, request: TestCaseGenerationRequest) -> str:
+        """The request-specific part of the prompt"""
+        return f"""Generate {request.num_test_cases} detailed test cases based on the following requirements:
+
+Requirements: {request.prompt}
+Test Type: {request.test_type}"""
+    
+    async def load_transcript_context(self, transcript_ids: List[str], use_digests: bool = True) -> str:
+        """Prompt context built from the selected meeting transcripts, digested where possible"""
+        if not transcript_ids:
+            return ""
+        with trace_span("transcript_lookup", requested=len(transcript_ids)) as span:
+            transcripts = await transcript_store.prompt_texts(transcript_ids, use_digests)
+            span.set(found=len(transcripts), digests=sum(transcript["digest"] for transcript in transcripts))
+        # A fixed order keeps the prompt prefix identical however the transcripts were selected
+        transcripts.sort(key=lambda transcript: (transcript["title"], transcript["id"]))
+        return "\n\n".join([
+            f"Meeting Transcript {'Digest ' if transcript['digest'] else ''}- {transcript['title']}:\n{transcript['text']}"
+            for transcript in transcripts
+        ])
+
+    async def call_provider(self, provider_config: AIProviderConfig, system_prompt: str, user_prompt: str) -> ProviderResult:
+        """One provider call within the token budget, timed and with its token usage recorded"""
+        adapter = self.get_adapter(provider_config)
+        with trace_span("token_budget"):
+            reserved = await token_budget.acquire(
+                estimate_tokens(system_prompt + user_prompt) + provider_config.max_tokens)
+        
+        with trace_span("provider_call", provider=provider_config.provider, model=provider_config.model) as span, \
+                observe_duration(PROVIDER_CALL_SECONDS, PROVIDER_ERRORS,
+                                 provider=provider_config.provider, model=provider_config.model):
+            try:
+                result = await adapter.generate(system_prompt, user_prompt)
+            except Exception:
+                token_budget.settle(reserved, 0)
+                raise
+            span.set(prompt_tokens=result.prompt_tokens or 0, cached_tokens=result.cached_tokens or 0)
+        
+        record_token_usage(provider_config.provider, provider_config.model,
+                           result.prompt_tokens, result.completion_tokens, result.cached_tokens)
+        if result.prompt_tokens is not None or result.completion_tokens is not None:
+            token_budget.settle(reserved, (result.prompt_tokens or 0) + (result.completion_tokens or 0))
+        return result
+
+    async def generate_test_cases(self, request: TestCaseGenerationRequest, file_contents: List[str] = None,
+                                  transcript_context: Optional[str] = None) -> List[TestCase]:
+        """Generate test cases using the active AI provider"""
+        provider_config = await self.get_active_provider()
+        if not provider_config:
+            raise HTTPException(status_code=400, detail="No active AI provider configured")
+        self.get_adapter(provider_config)  # rejects unsupported providers before any lookups
+        
+        # Add transcript context if provided; batches look it up once for all requirements
+        if transcript_context is None:
+            transcript_context = await self.load_transcript_context(
+                request.selected_transcripts, request.use_transcript_digests)
+        # Selected ALM items come from the local cache kept current by alm_manager.sync()
+        alm_context = await alm_manager.load_context(request.selected_alm, request.selected_alm_items)
+        
+        with trace_span("prompt_build") as span:
+            system_prompt = self.build_system_prompt(request, file_contents, transcript_context, alm_context)
+            user_prompt = self.build_user_prompt(request)
+            span.set(prompt_chars=len(system_prompt) + len(user_prompt), prefix_chars=len(system_prompt))
+
         try:
-            if provider_config.provider == 'openai':
-                openai.api_key = provider_config.api_key
-                response = openai.chat.completions.create(
-                    model=provider_config.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Generate {request.num_test_cases} test cases for: {request.prompt}"}
-                    ],
-                    max_tokens=provider_config.max_tokens,
-                    temperature=provider_config.temperature
-                )
-                content = response.choices[0].message.content
-                
-            elif provider_config.provider == 'anthropic':
-                client = anthropic.Anthropic(api_key=provider_config.api_key)
-                response = client.messages.create(
-                    model=provider_config.model,
-                    max_tokens=provider_config.max_tokens,
-                    temperature=provider_config.temperature,
-                    system=system_prompt,
-                    messages=[
-                        {"role": "user", "content": f"Generate {request.num_test_cases} test cases for: {request.prompt}"}
-                    ]
-                )
-                content = response.content[0].text
-                
-            elif provider_config.provider == 'google':
-                genai.configure(api_key=provider_config.api_key)
-                model = genai.GenerativeModel(provider_config.model)
-                response = model.generate_content(
-                    f"{system_prompt}\n\nGenerate {request.num_test_cases} test cases for: {request.prompt}",
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=provider_config.max_tokens,
-                        temperature=provider_config.temperature,
-                    )
-                )
-                content = response.text
+            result = await self.call_provider(provider_config, system_prompt, user_prompt)
+            content = result.content
             
-            # Parse the JSON response
-            try:
-                # Clean the response to extract JSON
-                content = content.strip()
-                if content.startswith('```json'):
-                    content = content[7:-3]
-                elif content.startswith('```'):
-                    content = content[3:-3]
+            with trace_span("parse", response_chars=len(content or "")) as span:
+                # Parse the JSON response
+                try:
+                    # Clean the response to extract JSON
+                    content = content.strip()
+                    if content.startswith('```json'):
+                        content = content[7:-3]
+                    elif content.startswith('```'):
+                        content = content[3:-3]
                 
-                test_cases_data = json.loads(content)
+                    test_cases_data = json.loads(content)
                 
-                # Convert to TestCase objects
-                test_cases = []
-                for tc_data in test_cases_data:
-                    test_case = TestCase(**tc_data)
-                    test_cases.append(test_case)
+                    # Convert to TestCase objects
+                    test_cases = []
+                    for tc_data in test_cases_data:
+                        test_case = TestCase(**tc_data)
+                        test_cases.append(test_case)
                 
-                return test_cases
+                    span.set(test_cases=len(test_cases))
+                    return test_cases
                 
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse AI response as JSON: {e}")
-                logger.error(f"Response content: {content}")
-                raise HTTPException(status_code=500, detail="Failed to parse AI response")
+                except (ValueError, TypeError) as e:
+                    # json.JSONDecodeError and pydantic's ValidationError are both ValueErrors
+                    LLM_PARSE_FAILURES.inc(provider=provider_config.provider, model=provider_config.model)
+                    logger.error(f"Failed to parse AI response as JSON: {e}")
+                    logger.error(f"Response content: {content}")
+                    raise HTTPException(status_code=500, detail="Failed to parse AI response")
                 
         except Exception as e:
             logger.error(f"AI generation failed: {e}")
@@ -268,62 +2052,380 @@ Make sure the test cases are realistic, actionable, and cover different scenario
 
 ai_manager = AIProviderManager()
 
+# Transcript digests
+# Transcripts are digested once, in the background after upload, into the
+# requirements, decisions and acceptance criteria they contain. Generation
+# sends the digest instead of the raw transcript unless asked not to.
+TRANSCRIPT_DIGEST_MODE = os.environ.get('TRANSCRIPT_DIGEST_MODE', 'llm').lower()  # 'llm', 'extractive' or 'off'
+DIGEST_WORKERS = int(os.environ.get('DIGEST_WORKERS', '2'))
+DIGEST_MIN_CHARS = 2000  # shorter transcripts are sent as they are
+DIGEST_CHUNK_CHARS = 48000  # transcript characters per LLM digest call
+DIGEST_MAX_CHARS = 4000  # extractive digest budget
+DIGEST_MAX_RATIO = 0.8  # a digest must be at least this much smaller to be used
+# A running digest not finished after this long is taken over (its worker is presumed dead)
+DIGEST_CLAIM_TIMEOUT_SECONDS = float(os.environ.get('DIGEST_CLAIM_TIMEOUT_SECONDS', '900'))
+
+DIGEST_SYSTEM_PROMPT = """You condense meeting transcripts for QA engineers who will write test cases from them.
+
+From the transcript excerpt, extract only:
+
+Requirements:
+- ...
+Decisions:
+- ...
+Acceptance criteria:
+- ...
+Open questions:
+- ...
+
+Use short bullet points. Keep exact feature names, fields, values, limits and error messages. Leave out small talk and anything not relevant to testing. Write "- none" under a heading with nothing to report."""
+
+# Checked in order; a sentence goes under the first section whose cue it contains
+DIGEST_SECTIONS = [
+    ("Decisions", re.compile(r"\b(decided|decision|agreed|approved|we will|we'll|going with|settled on|final call)\b")),
+    ("Acceptance criteria", re.compile(
+        r"\b(acceptance|criteria|given\b.+\bwhen|expected (result|behaviou?r)|error message|verify|validat\w*|"
+        r"(should|must) (show|display|return|see|receive|reject|be able))")),
+    ("Requirements", re.compile(r"\b(must|should|shall|needs? to|has to|have to|required?|requirements?|support|allow)\b")),
+]
+DIGEST_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+DIGEST_WORD = re.compile(r"[a-z][a-z'-]{2,}")
+DIGEST_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its may new now old see two "
+    "who did get let put say she too use that with have this will your from they know want been good much some "
+    "time very when come here just like long make many more only over such take than them well were what yeah okay "
+    "think going about would there their could should really right so".split()
+)
+
+def extractive_digest(text: str, max_chars: int = DIGEST_MAX_CHARS) -> str:
+    """Digest without an LLM: the most salient cue-bearing sentences, grouped by section"""
+    sentences = [sentence.strip() for sentence in DIGEST_SENTENCE_SPLIT.split(text) if len(sentence.strip()) > 20]
+    terms = [[word for word in DIGEST_WORD.findall(sentence.lower()) if word not in DIGEST_STOPWORDS]
+             for sentence in sentences]
+    frequency: Dict[str, int] = {}
+    for sentence_terms in terms:
+        for word in sentence_terms:
+            frequency[word] = frequency.get(word, 0) + 1
+    
+    candidates = []
+    seen = set()
+    for index, (sentence, sentence_terms) in enumerate(zip(sentences, terms)):
+        lowered = sentence.lower()
+        if lowered in seen:
+            continue  # points repeated during the meeting are kept once
+        seen.add(lowered)
+        section = next((name for name, cue in DIGEST_SECTIONS if cue.search(lowered)), None)
+        if section is None:
+            continue
+        # Sentences about the meeting's recurring topics score higher
+        salience = sum(frequency[word] for word in set(sentence_terms)) / (len(sentence_terms) + 1)
+        candidates.append((salience, index, section, sentence))
+    
+    chosen = []
+    used = 0
+    for salience, index, section, sentence in sorted(candidates, reverse=True):
+        if used + len(sentence) > max_chars:
+            continue
+        chosen.append((index, section, sentence))
+        used += len(sentence) + 3
+    
+    lines = []
+    for name, _ in DIGEST_SECTIONS:
+        section_sentences = [sentence for index, section, sentence in sorted(chosen) if section == name]
+        if section_sentences:
+            lines.append(f"{name}:")
+            lines.extend(f"- {sentence}" for sentence in section_sentences)
+    return "\n".join(lines)
+
+def split_for_digest(text: str, chunk_chars: int = DIGEST_CHUNK_CHARS) -> List[str]:
+    """Split text into chunks of at most chunk_chars, at line breaks where possible"""
+    chunks = []
+    while len(text) > chunk_chars:
+        cut = text.rfind("\n", 0, chunk_chars)
+        if cut <= 0:
+            cut = chunk_chars
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+class TranscriptDigester:
+    """Background workers digesting transcripts once, after they are stored"""
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+
+    async def start(self, workers: int):
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self.work()) for _ in range(max(1, workers))]
+        # Digests still pending when the server last stopped; every worker process queues
+        # them, and claim() lets only one of them digest each transcript
+        async for doc in db.transcripts.find(self.claimable(), {"_id": 0, "id": 1}):
+            self.queue.put_nowait(doc["id"])
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    @staticmethod
+    def claimable() -> Dict[str, Any]:
+        """Pending digests, and running ones whose claim has expired"""
+        expired = datetime.utcnow() - timedelta(seconds=DIGEST_CLAIM_TIMEOUT_SECONDS)
+        return {"$or": [
+            {"digest_status": "pending"},
+            {"digest_status": "running", "digest_claimed_at": {"$lt": expired}},
+        ]}
+
+    async def claim(self, transcript_id: str) -> bool:
+        """Atomically move a claimable digest to running; False if another worker has it"""
+        doc = await db.transcripts.find_one_and_update(
+            {"id": transcript_id, **self.claimable()},
+            {"$set": {"digest_status": "running", "digest_claimed_at": datetime.utcnow()}},
+            projection={"_id": 0, "id": 1},
+        )
+        return doc is not None
+
+    async def enqueue(self, transcript_id: str) -> Optional[str]:
+        """Mark a transcript's digest pending and queue it; returns the digest status"""
+        if TRANSCRIPT_DIGEST_MODE == 'off':
+            return None
+        await db.transcripts.update_one({"id": transcript_id}, {"$set": {"digest_status": "pending"}})
+        # Without running workers it stays pending until the next startup
+        if self.queue is not None:
+            self.queue.put_nowait(transcript_id)
+        return "pending"
+
+    async def work(self):
+        while True:
+            transcript_id = await self.queue.get()
+            try:
+                await self.digest(transcript_id)
+            except Exception as e:
+                logger.warning(f"Digest of transcript {transcript_id} failed: {e}")
+                await db.transcripts.update_one({"id": transcript_id}, {"$set": {"digest_status": "failed"}})
+            finally:
+                self.queue.task_done()
+
+    async def llm_digest(self, provider_config: AIProviderConfig, title: str, content: str) -> str:
+        chunks = split_for_digest(content)
+        results = await asyncio.gather(*(
+            ai_manager.call_provider(provider_config, DIGEST_SYSTEM_PROMPT, f"Transcript: {title}\n\n{chunk}")
+            for chunk in chunks
+        ))
+        digests = [result.content.strip() for result in results]
+        if len(digests) == 1:
+            return digests[0]
+        return "\n\n".join(f"Part {number}:\n{digest}" for number, digest in enumerate(digests, start=1))
+
+    async def build(self, title: str, content: str) -> Tuple[str, str]:
+        """The digest and the method used; LLM digests fall back to the extractive summarizer"""
+        if TRANSCRIPT_DIGEST_MODE == 'llm':
+            provider_config = await ai_manager.get_active_provider()
+            if provider_config:
+                try:
+                    with observe_duration(TRANSCRIPT_DIGEST_SECONDS, method="llm"):
+                        return await self.llm_digest(provider_config, title, content), "llm"
+                except Exception as e:
+                    logger.warning(f"LLM digest failed, using the extractive summarizer: {e}")
+        with observe_duration(TRANSCRIPT_DIGEST_SECONDS, method="extractive"):
+            return await asyncio.to_thread(extractive_digest, content), "extractive"
+
+    async def digest(self, transcript_id: str):
+        if not await self.claim(transcript_id):
+            return  # deleted while queued, or digested by another worker
+        transcript = await transcript_store.get(transcript_id)
+        if transcript is None:
+            return
+        fields = {"digest": None, "digest_method": None, "digest_status": "skipped"}
+        if len(transcript.content) >= DIGEST_MIN_CHARS:
+            digest, method = await self.build(transcript.title, transcript.content)
+            if digest and len(digest) < len(transcript.content) * DIGEST_MAX_RATIO:
+                fields = {"digest": digest, "digest_method": method, "digest_status": "ready"}
+        await db.transcripts.update_one({"id": transcript_id}, {"$set": fields})
+        logger.info(f"Transcript {transcript_id} digest {fields['digest_status']}"
+                    f" ({len(transcript.content)} -> {len(fields['digest'] or '')} chars)")
+
+transcript_digester = TranscriptDigester()
+
+# Warm-up
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', '').lower()  # '', 'provider' or 'all'
+EXTRACTION_EXPORT_MODULES = ("PyPDF2", "docx", "openpyxl")
+
+async def warm_up(include_all: bool = False) -> Dict[str, Any]:
+    """Import lazily loaded dependencies and build the active provider's adapter ahead of traffic"""
+    started = time.perf_counter()
+    provider_config = await ai_manager.get_active_provider()
+    
+    modules = []
+    if include_all:
+        modules.extend(adapter_cls.sdk_module for adapter_cls in PROVIDER_ADAPTERS.values())
+        modules.extend(EXTRACTION_EXPORT_MODULES)
+    elif provider_config and provider_config.provider in PROVIDER_ADAPTERS:
+        modules.append(PROVIDER_ADAPTERS[provider_config.provider].sdk_module)
+    modules = list(dict.fromkeys(modules))
+    
+    for module in modules:
+        # Import in a worker thread so the event loop keeps serving requests meanwhile
+        await asyncio.to_thread(importlib.import_module, module)
+    if provider_config:
+        ai_manager.get_adapter(provider_config)
+    
+    return {
+        "modules": modules,
+        "provider": provider_config.provider if provider_config else None,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
 # File processing utilities
 async def process_uploaded_file(file: UploadFile) -> str:
     """Process uploaded file and extract text content"""
     try:
         content = await file.read()
+        file_type = Path(file.filename).suffix.lower().lstrip('.') or 'unknown'
         
-        if file.filename.endswith('.txt'):
-            return content.decode('utf-8')
-        
-        elif file.filename.endswith('.pdf'):
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            return text
-        
-        elif file.filename.endswith('.docx'):
-            doc = Document(io.BytesIO(content))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text
-        
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format")
+        with trace_span("process_uploaded_file", filename=file.filename, file_type=file_type, bytes=len(content)), \
+                observe_duration(FILE_EXTRACTION_SECONDS, file_type=file_type):
+            # PDF/DOCX parsing is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(_extract_text, file.filename, content)
             
     except Exception as e:
         logger.error(f"File processing failed: {e}")
         raise HTTPException(status_code=500, detail=f"File processing failed: {str(e)}")
 
+def _extract_text(filename: str, content: bytes) -> str:
+    """Extract plain text from raw file bytes based on the file extension"""
+    if filename.endswith('.txt'):
+        return content.decode('utf-8')
+    
+    elif filename.endswith('.pdf'):
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+        text = ""
+        for page in pdf_reader.pages:
+            text += page.extract_text()
+        return text
+    
+    elif filename.endswith('.docx'):
+        from docx import Document
+        doc = Document(io.BytesIO(content))
+        text = ""
+        for paragraph in doc.paragraphs:
+            text += paragraph.text + "\n"
+        return text
+    
+    else:
+        raise HTTPException(status_code=400, detail="Unsupported file format")
+
 # API Routes
 
 # AI Provider Configuration
 @api_router.post("/ai-providers", response_model=AIProviderConfig)
 async def create_ai_provider(config: AIProviderConfigCreate):
     """Create or update AI provider configuration"""
+    provider_dict = config.dict()
+    provider_obj = AIProviderConfig(**provider_dict)
+    adapter_cls = PROVIDER_ADAPTERS.get(provider_obj.provider)
+    if adapter_cls is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported AI provider: {provider_obj.provider}")
+    adapter_cls.validate_config(provider_obj)
+    
     # Deactivate existing providers
     await db.ai_configs.update_many({}, {"$set": {"is_active": False}})
     
     # Create new active provider
-    provider_dict = config.dict()
-    provider_obj = AIProviderConfig(**provider_dict)
     await db.ai_configs.insert_one(provider_obj.dict())
+    await ai_manager.discard_inactive(provider_obj.id)
     return provider_obj
 
 @api_router.get("/ai-providers", response_model=List[AIProviderConfig])
-async def get_ai_providers():
+async def get_ai_providers(request: Request):
     """Get all AI provider configurations"""
-    providers = await db.ai_configs.find().to_list(1000)
-    return [AIProviderConfig(**provider) for provider in providers]
+    providers = await db.ai_configs.find({}, AI_PROVIDER_PROJECTION.projection).to_list(1000)
+    return fast_json_response(providers, AI_PROVIDER_PROJECTION, request)
 
 @api_router.get("/ai-providers/active", response_model=Optional[AIProviderConfig])
 async def get_active_ai_provider():
     """Get active AI provider configuration"""
     return await ai_manager.get_active_provider()
 
+# ALM Integration
+@api_router.post("/alm-configs", response_model=ALMConfigSummary)
+async def create_alm_config(config: ALMConfigCreate):
+    """Create ALM configuration, replacing the active one of the same type"""
+    config_obj = ALMConfig(**config.dict())
+    connector_cls = ALM_CONNECTORS.get(config_obj.alm_type)
+    if connector_cls is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported ALM system: {config_obj.alm_type}")
+    connector_cls.validate_config(config_obj)
+    
+    await db.alm_configs.update_many({"alm_type": config_obj.alm_type}, {"$set": {"is_active": False}})
+    await db.alm_configs.insert_one(config_obj.dict())
+    return config_obj
+
+@api_router.get("/alm-configs", response_model=List[ALMConfigSummary])
+async def get_alm_configs(request: Request):
+    """Get all ALM configurations"""
+    configs = await db.alm_configs.find({}, ALM_CONFIG_PROJECTION.projection).to_list(1000)
+    return fast_json_response(configs, ALM_CONFIG_PROJECTION, request)
+
+@api_router.delete("/alm-configs/{config_id}")
+async def delete_alm_config(config_id: str):
+    """Delete ALM configuration and its cached items"""
+    result = await db.alm_configs.delete_one({"id": config_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="ALM configuration not found")
+    await db.alm_items.delete_many({"config_id": config_id})
+    await alm_manager.discard(config_id)
+    return {"message": "ALM configuration deleted successfully"}
+
+@api_router.post("/alm/{alm_type}/sync")
+async def sync_alm_items(alm_type: str, full: bool = False):
+    """Sync the active configuration's items into the local cache"""
+    config = await alm_manager.get_active_config(alm_type)
+    if not config:
+        raise HTTPException(status_code=400, detail=f"No active {alm_type} configuration")
+    try:
+        return await alm_manager.sync(config, full=full)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"ALM sync failed: {e}")
+        raise HTTPException(status_code=502, detail=f"ALM sync failed: {str(e)}")
+
+@api_router.get("/alm/{alm_type}/items", response_model=List[ALMItem])
+async def get_alm_items(request: Request, alm_type: str, search: str = "", limit: int = 200):
+    """Get cached items of the active configuration, most recently updated first"""
+    config = await alm_manager.get_active_config(alm_type)
+    if not config:
+        return fast_json_response([], ALM_ITEM_PROJECTION, request)
+    query = {"config_id": config.id}
+    if search:
+        pattern = {"$regex": re.escape(search), "$options": "i"}
+        query["$or"] = [{"key": pattern}, {"title": pattern}]
+    limit = max(1, min(limit, 1000))
+    items = await db.alm_items.find(query, ALM_ITEM_PROJECTION.projection).sort("updated_at", -1).limit(limit).to_list(limit)
+    return fast_json_response(items, ALM_ITEM_PROJECTION, request)
+
+@api_router.post("/alm/{alm_type}/push")
+async def push_test_cases_to_alm(alm_type: str, push: Optional[ALMPushRequest] = None):
+    """Create ALM items for the selected test cases; reruns skip cases already pushed"""
+    config = await alm_manager.get_active_config(alm_type)
+    if not config:
+        raise HTTPException(status_code=400, detail=f"No active {alm_type} configuration")
+    return await alm_manager.push(config, push.test_case_ids if push else None)
+
+@api_router.get("/alm/{alm_type}/push-mappings", response_model=List[ALMPushMapping])
+async def get_alm_push_mappings(request: Request, alm_type: str, test_case_id: Optional[str] = None):
+    """Get the test case id to ALM key mappings recorded by pushes"""
+    query = {"alm_type": alm_type}
+    if test_case_id:
+        query["test_case_id"] = test_case_id
+    mappings = await db.alm_push_mappings.find(query, ALM_PUSH_MAPPING_PROJECTION.projection).to_list(10000)
+    return fast_json_response(mappings, ALM_PUSH_MAPPING_PROJECTION, request)
+
 # Test Case Generation
 @api_router.post("/generate-test-cases", response_model=List[TestCase])
 async def generate_test_cases(
@@ -333,6 +2435,7 @@ async def generate_test_cases(
     selected_transcripts: str = Form("[]"),
     selected_alm: str = Form(""),
     selected_alm_items: str = Form("[]"),
+    use_transcript_digests: bool = Form(True),
     files: List[UploadFile] = File(default=[])
 ):
     """Generate test cases using AI"""
@@ -344,37 +2447,249 @@ async def generate_test_cases(
             content = await process_uploaded_file(file)
             file_contents.append(content)
     
-    # Parse selected transcripts
+    # Parse selected transcripts and ALM items
     try:
         transcript_ids = json.loads(selected_transcripts)
     except:
         transcript_ids = []
+    try:
+        alm_item_keys = json.loads(selected_alm_items)
+    except:
+        alm_item_keys = []
     
     # Create generation request
     request = TestCaseGenerationRequest(
         prompt=prompt,
         test_type=test_type,
-        num_test_cases=num_test_cases
+        num_test_cases=num_test_cases,
+        selected_transcripts=transcript_ids,
+        selected_alm=selected_alm,
+        selected_alm_items=alm_item_keys,
+        use_transcript_digests=use_transcript_digests
     )
     
-    # Add transcript context to request for processing
-    request.selected_transcripts = transcript_ids
-    
     # Generate test cases
     test_cases = await ai_manager.generate_test_cases(request, file_contents)
     
     # Save to database
-    for test_case in test_cases:
-        await db.test_cases.insert_one(test_case.dict())
+    with trace_span("persist", test_cases=len(test_cases)):
+        for test_case in test_cases:
+            await db.test_cases.insert_one(test_case.dict())
     
     return test_cases
 
+# Delta sync
+# Every test case list response carries an X-Sync-Token header. Passing it back
+# as ?since= returns only the test cases updated since then plus the ids deleted
+# since then (tombstones). Tokens older than the tombstone retention, or than
+# the last delete-all (recorded once as a reset time rather than a tombstone
+# per test case), get the full list with "full": true; so do deltas larger
+# than TEST_CASE_LIST_LIMIT, rather than being cut short.
+TEST_CASE_LIST_LIMIT = 1000
+TOMBSTONE_RETENTION_DAYS = int(os.environ.get('TOMBSTONE_RETENTION_DAYS', '7'))
+# Tokens lag the clock so writes stamped just before a list query, but
+# committed after it, still show up in the next delta
+SYNC_TOKEN_OVERLAP = timedelta(seconds=5)
+
+def new_sync_token() -> datetime:
+    # Millisecond precision, like the updated_at values BSON stores
+    now = datetime.utcnow() - SYNC_TOKEN_OVERLAP
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def as_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+async def last_test_case_reset() -> Optional[datetime]:
+    doc = await db.sync_state.find_one({"_id": "test_cases"})
+    return (doc or {}).get("reset_at")
+
+async def record_tombstones(test_case_ids: List[str]):
+    if test_case_ids:
+        deleted_at = datetime.utcnow()
+        await db.test_case_tombstones.insert_many(
+            [{"id": test_case_id, "deleted_at": deleted_at} for test_case_id in test_case_ids])
+
+# Batch generation
+# One submission carries a whole list of requirements. They run concurrently,
+# at most BATCH_MAX_CONCURRENCY at a time across all batches and within the
+# shared token budget, and progress streams back as NDJSON events.
+BATCH_MAX_CONCURRENCY = int(os.environ.get('BATCH_MAX_CONCURRENCY', '4'))
+BATCH_MAX_REQUIREMENTS = int(os.environ.get('BATCH_MAX_REQUIREMENTS', '1000'))
+batch_slots = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+# Accepted column/key names for each requirement field
+REQUIREMENT_COLUMNS = {
+    "id": ("id", "requirement_id", "key"),
+    "requirement": ("requirement", "prompt", "description", "text"),
+    "test_type": ("test_type", "type"),
+    "num_test_cases": ("num_test_cases", "count", "test_cases"),
+}
+
+def _requirement_rows(filename: str, content: bytes) -> List[Dict[str, Any]]:
+    name = filename.lower()
+    if name.endswith('.json'):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            data = data.get("requirements", [])
+        if not isinstance(data, list):
+            raise ValueError("expected a list of requirements")
+        return [row if isinstance(row, dict) else {"requirement": row} for row in data]
+    if name.endswith('.csv'):
+        return list(csv.DictReader(io.StringIO(content.decode('utf-8-sig'))))
+    if name.endswith('.xlsx'):
+        import openpyxl
+        workbook = openpyxl.load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        return [dict(zip(header, row)) for row in rows]
+    raise ValueError("unsupported format, use .csv, .xlsx or .json")
+
+def parse_requirements(filename: str, content: bytes, test_type: str, num_test_cases: int) -> List[BatchRequirement]:
+    """Requirements from a CSV/XLSX/JSON file; missing test_type/count use the given defaults"""
+    requirements = []
+    for number, row in enumerate(_requirement_rows(filename, content), start=1):
+        values = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+        fields = {}
+        for field, aliases in REQUIREMENT_COLUMNS.items():
+            value = next((values[alias] for alias in aliases if values.get(alias) not in (None, "")), None)
+            if value is not None:
+                fields[field] = value.strip() if isinstance(value, str) else value
+        if not fields.get("requirement"):
+            continue  # blank rows
+        fields["id"] = str(fields.get("id", f"row-{number}"))
+        fields["requirement"] = str(fields["requirement"])
+        fields.setdefault("test_type", test_type)
+        fields.setdefault("num_test_cases", num_test_cases)
+        try:
+            requirements.append(BatchRequirement(**fields))
+        except ValueError as e:
+            raise ValueError(f"row {number}: {e}")
+    return requirements
+
+async def generate_for_requirement(batch_id: str, requirement: BatchRequirement, transcript_context: str) -> Dict[str, Any]:
+    """Generate and store the test cases for one requirement; never raises"""
+    event = {"event": "requirement", "requirement_id": requirement.id}
+    async with batch_slots:
+        with trace_span("batch_requirement", requirement_id=requirement.id):
+            request = TestCaseGenerationRequest(
+                prompt=requirement.requirement,
+                test_type=requirement.test_type,
+                num_test_cases=requirement.num_test_cases,
+            )
+            try:
+                test_cases = await ai_manager.generate_test_cases(request, transcript_context=transcript_context)
+                for test_case in test_cases:
+                    test_case.requirement_id = requirement.id
+                    test_case.batch_id = batch_id
+                if test_cases:
+                    await db.test_cases.insert_many([test_case.dict() for test_case in test_cases])
+            except Exception as e:
+                logger.error(f"Batch {batch_id} requirement {requirement.id} failed: {e}")
+                BATCH_REQUIREMENTS.inc(outcome="failed")
+                detail = e.detail if isinstance(e, HTTPException) else str(e)
+                return {**event, "status": "failed", "error": detail}
+    BATCH_REQUIREMENTS.inc(outcome="succeeded")
+    return {**event, "status": "succeeded", "test_cases": [test_case.dict() for test_case in test_cases]}
+
+async def stream_batch(batch_id: str, requirements: List[BatchRequirement], transcript_context: str):
+    """NDJSON events: started, one requirement event per requirement as it finishes, completed"""
+    started = time.perf_counter()
+    total = len(requirements)
+    yield orjson.dumps({"event": "started", "batch_id": batch_id, "total": total}) + b"\n"
+    
+    tasks = [
+        asyncio.create_task(generate_for_requirement(batch_id, requirement, transcript_context))
+        for requirement in requirements
+    ]
+    counts = {"succeeded": 0, "failed": 0, "test_cases_generated": 0}
+    try:
+        for done, next_result in enumerate(asyncio.as_completed(tasks), start=1):
+            result = await next_result
+            counts[result["status"]] += 1
+            counts["test_cases_generated"] += len(result.get("test_cases", []))
+            yield orjson.dumps({**result, "batch_id": batch_id, "done": done, "total": total}) + b"\n"
+        yield orjson.dumps({
+            "event": "completed",
+            "batch_id": batch_id,
+            "total": total,
+            **counts,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }) + b"\n"
+    finally:
+        # The client went away: stop the requirements that have not finished
+        for task in tasks:
+            task.cancel()
+
+@api_router.post("/generate-test-cases/batch")
+async def generate_test_cases_batch(
+    requirements_file: UploadFile = File(...),
+    test_type: str = Form("Functional"),
+    num_test_cases: int = Form(5),
+    selected_transcripts: str = Form("[]"),
+    use_transcript_digests: bool = Form(True)
+):
+    """Generate test cases for every requirement in a CSV/XLSX/JSON file, streaming progress"""
+    content = await requirements_file.read()
+    try:
+        requirements = await asyncio.to_thread(
+            parse_requirements, requirements_file.filename or "", content, test_type, num_test_cases)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid requirements file: {str(e)}")
+    if not requirements:
+        raise HTTPException(status_code=400, detail="No requirements found in file")
+    if len(requirements) > BATCH_MAX_REQUIREMENTS:
+        raise HTTPException(status_code=400, detail=f"A batch is limited to {BATCH_MAX_REQUIREMENTS} requirements")
+    if not await ai_manager.get_active_provider():
+        raise HTTPException(status_code=400, detail="No active AI provider configured")
+    
+    try:
+        transcript_ids = json.loads(selected_transcripts)
+    except:
+        transcript_ids = []
+    transcript_context = await ai_manager.load_transcript_context(transcript_ids, use_transcript_digests)
+    
+    batch_id = str(uuid.uuid4())
+    logger.info(f"Batch {batch_id}: {len(requirements)} requirements")
+    return StreamingResponse(
+        stream_batch(batch_id, requirements, transcript_context),
+        media_type="application/x-ndjson"
+    )
+
 # Test Case Management
 @api_router.get("/test-cases", response_model=List[TestCase])
-async def get_test_cases():
-    """Get all test cases"""
-    test_cases = await db.test_cases.find().sort("created_at", -1).to_list(1000)
-    return [TestCase(**tc) for tc in test_cases]
+async def get_test_cases(request: Request, since: Optional[datetime] = None):
+    """Get all test cases, or {items, deleted, full} changes since a sync token"""
+    sync_headers = {"X-Sync-Token": new_sync_token().isoformat()}
+    if since is None:
+        test_cases = await db.test_cases.find({}, TEST_CASE_PROJECTION.projection).sort(
+            "created_at", -1).to_list(TEST_CASE_LIST_LIMIT)
+        return fast_json_response(test_cases, TEST_CASE_PROJECTION, request, sync_headers)
+    
+    since = as_naive_utc(since)
+    reset_at = await last_test_case_reset()
+    full = since < datetime.utcnow() - timedelta(days=TOMBSTONE_RETENTION_DAYS) or (
+        reset_at is not None and since < reset_at)
+    test_cases = None
+    if not full:
+        # One over the limit tells a delta that would have been truncated
+        test_cases = await db.test_cases.find({"updated_at": {"$gte": since}}, TEST_CASE_PROJECTION.projection).sort(
+            "created_at", -1).to_list(TEST_CASE_LIST_LIMIT + 1)
+        full = len(test_cases) > TEST_CASE_LIST_LIMIT
+    if full:
+        test_cases = await db.test_cases.find({}, TEST_CASE_PROJECTION.projection).sort(
+            "created_at", -1).to_list(TEST_CASE_LIST_LIMIT)
+    deleted = []
+    if not full:
+        deleted = await db.test_case_tombstones.distinct("id", {"deleted_at": {"$gte": since}})
+    
+    content = orjson.dumps({
+        "items": [TEST_CASE_PROJECTION.complete(doc) for doc in test_cases],
+        "deleted": deleted,
+        "full": full,
+    })
+    return conditional_json_response(request, content, sync_headers)
 
 @api_router.get("/test-cases/{test_case_id}", response_model=TestCase)
 async def get_test_case(test_case_id: str):
@@ -407,6 +2722,7 @@ async def delete_test_case(test_case_id: str):
     result = await db.test_cases.delete_one({"id": test_case_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Test case not found")
+    await record_tombstones([test_case_id])
     return {"message": "Test case deleted successfully"}
 
 @api_router.post("/test-cases/bulk-select")
@@ -414,7 +2730,7 @@ async def bulk_select_test_cases(test_case_ids: List[str]):
     """Bulk select/deselect test cases"""
     await db.test_cases.update_many(
         {"id": {"$in": test_case_ids}},
-        {"$set": {"is_selected": True}}
+        {"$set": {"is_selected": True, "updated_at": datetime.utcnow()}}
     )
     return {"message": f"Selected {len(test_case_ids)} test cases"}
 
@@ -422,16 +2738,18 @@ async def bulk_select_test_cases(test_case_ids: List[str]):
 async def delete_all_test_cases():
     """Delete all test cases"""
     result = await db.test_cases.delete_many({})
+    # Stamped after the delete, so every token handed out before it finished
+    # gets a full list; earlier tombstones are superseded
+    reset_at = datetime.utcnow()
+    await db.sync_state.update_one({"_id": "test_cases"}, {"$set": {"reset_at": reset_at}}, upsert=True)
+    await db.test_case_tombstones.delete_many({"deleted_at": {"$lt": reset_at}})
     return {"message": f"Deleted {result.deleted_count} test cases"}
 
 # Export functionality
-@api_router.get("/export/excel")
-async def export_to_excel():
-    """Export selected test cases to Excel"""
-    test_cases = await db.test_cases.find({"is_selected": True}).to_list(1000)
-    
-    if not test_cases:
-        raise HTTPException(status_code=400, detail="No test cases selected for export")
+def build_excel_workbook(test_cases: List[Dict[str, Any]]) -> io.BytesIO:
+    """Render test case documents into an in-memory xlsx file"""
+    import openpyxl
+    from openpyxl.styles import Font, Alignment, PatternFill
     
     # Create Excel workbook
     wb = openpyxl.Workbook()
@@ -475,6 +2793,18 @@ async def export_to_excel():
     output = io.BytesIO()
     wb.save(output)
     output.seek(0)
+    return output
+
+@api_router.get("/export/excel")
+async def export_to_excel():
+    """Export selected test cases to Excel"""
+    test_cases = await db.test_cases.find({"is_selected": True}).to_list(1000)
+    
+    if not test_cases:
+        raise HTTPException(status_code=400, detail="No test cases selected for export")
+    
+    with observe_duration(EXPORT_SECONDS, format="excel"):
+        output = await asyncio.to_thread(build_excel_workbook, test_cases)
     
     return StreamingResponse(
         io.BytesIO(output.read()),
@@ -485,20 +2815,21 @@ async def export_to_excel():
 @api_router.get("/export/json")
 async def export_to_json():
     """Export selected test cases to JSON"""
-    test_cases = await db.test_cases.find({"is_selected": True}).to_list(1000)
+    test_cases = await db.test_cases.find({"is_selected": True}, {"_id": 0}).to_list(1000)
     
     if not test_cases:
         raise HTTPException(status_code=400, detail="No test cases selected for export")
     
-    # Convert to JSON serializable format
-    export_data = []
-    for tc in test_cases:
-        tc_dict = dict(tc)
-        tc_dict["created_at"] = tc_dict["created_at"].isoformat()
-        tc_dict["updated_at"] = tc_dict["updated_at"].isoformat()
-        export_data.append(tc_dict)
-    
-    json_data = json.dumps(export_data, indent=2)
+    with observe_duration(EXPORT_SECONDS, format="json"):
+        # Convert to JSON serializable format
+        export_data = []
+        for tc in test_cases:
+            tc_dict = dict(tc)
+            tc_dict["created_at"] = tc_dict["created_at"].isoformat()
+            tc_dict["updated_at"] = tc_dict["updated_at"].isoformat()
+            export_data.append(tc_dict)
+        
+        json_data = json.dumps(export_data, indent=2)
     
     return StreamingResponse(
         io.BytesIO(json_data.encode()),
@@ -512,28 +2843,28 @@ async def create_transcript(transcript: TranscriptCreate):
     """Create a new transcript"""
     transcript_dict = transcript.dict()
     transcript_obj = Transcript(**transcript_dict)
-    await db.transcripts.insert_one(transcript_obj.dict())
+    await transcript_store.insert(transcript_obj)
+    transcript_obj.digest_status = await transcript_digester.enqueue(transcript_obj.id)
     return transcript_obj
 
 @api_router.get("/transcripts", response_model=List[Transcript])
-async def get_transcripts():
+async def get_transcripts(request: Request):
     """Get all transcripts"""
-    transcripts = await db.transcripts.find().sort("created_at", -1).to_list(1000)
-    return [Transcript(**t) for t in transcripts]
+    transcripts = await transcript_store.list_previews()
+    return fast_json_response(transcripts, TRANSCRIPT_PROJECTION, request)
 
 @api_router.get("/transcripts/{transcript_id}", response_model=Transcript)
 async def get_transcript(transcript_id: str):
     """Get specific transcript"""
-    transcript = await db.transcripts.find_one({"id": transcript_id})
+    transcript = await transcript_store.get(transcript_id)
     if not transcript:
         raise HTTPException(status_code=404, detail="Transcript not found")
-    return Transcript(**transcript)
+    return transcript
 
 @api_router.delete("/transcripts/{transcript_id}")
 async def delete_transcript(transcript_id: str):
     """Delete transcript"""
-    result = await db.transcripts.delete_one({"id": transcript_id})
-    if result.deleted_count == 0:
+    if not await transcript_store.delete(transcript_id):
         raise HTTPException(status_code=404, detail="Transcript not found")
     return {"message": "Transcript deleted successfully"}
 
@@ -553,11 +2884,27 @@ async def upload_transcripts(files: List[UploadFile] = File(...)):
                 content=text_content
             )
             
-            await db.transcripts.insert_one(transcript.dict())
+            await transcript_store.insert(transcript)
+            transcript.digest_status = await transcript_digester.enqueue(transcript.id)
             transcripts.append(transcript)
     
     return {"message": f"Uploaded {len(transcripts)} transcripts", "transcripts": transcripts}
 
+@api_router.post("/transcripts/migrate-storage")
+async def migrate_transcript_storage(batch_size: int = 100):
+    """Compress/offload transcripts stored before the compressed storage layout"""
+    return await transcript_store.migrate(batch_size)
+
+@api_router.post("/transcripts/digests")
+async def digest_transcripts(retry_failed: bool = True):
+    """Queue digests for transcripts stored before digests existed (and failed ones)"""
+    statuses = [None, "failed"] if retry_failed else [None]
+    queued = 0
+    async for doc in db.transcripts.find({"digest_status": {"$in": statuses}}, {"_id": 0, "id": 1}):
+        if await transcript_digester.enqueue(doc["id"]):
+            queued += 1
+    return {"queued": queued}
+
 # Health check
 @api_router.get("/")
 async def root():
@@ -567,17 +2914,95 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@api_router.post("/warmup")
+async def warmup(include_all: bool = False):
+    """Preload the active provider's SDK, or every lazily imported dependency"""
+    return await warm_up(include_all)
+
+@api_router.get("/traces")
+async def get_traces(limit: int = 50):
+    """List the most recent pipeline traces, newest first"""
+    traces = list(recent_traces)[-limit:]
+    return [trace.to_dict() for trace in reversed(traces)]
+
+@api_router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get the span timeline of a single trace"""
+    for trace in reversed(recent_traces):
+        if trace.trace_id == trace_id:
+            return trace.to_dict()
+    raise HTTPException(status_code=404, detail="Trace not found")
+
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Expose collected metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS so rejections still carry the CORS headers browsers need to read them
+app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Sync-Token", "Retry-After"],
 )
 
+# Added last so they wrap the whole stack, CORS included
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.on_event("startup")
+async def warm_up_on_startup():
+    if WARMUP_ON_STARTUP not in ("provider", "all"):
+        return
+    try:
+        result = await warm_up(include_all=WARMUP_ON_STARTUP == "all")
+        logger.info(f"Warm-up loaded {result['modules']} in {result['duration_ms']}ms")
+    except Exception as e:
+        logger.warning(f"Startup warm-up failed: {e}")
+
+@app.on_event("startup")
+async def create_sync_indexes():
+    try:
+        await db.test_cases.create_index("updated_at")
+        await db.test_case_tombstones.create_index(
+            "deleted_at", expireAfterSeconds=TOMBSTONE_RETENTION_DAYS * 24 * 3600)
+    except Exception as e:
+        logger.warning(f"Creating sync indexes failed: {e}")
+
+@app.on_event("startup")
+async def start_alm_sync():
+    try:
+        await db.alm_items.create_index("id", unique=True)
+        await db.alm_items.create_index([("config_id", 1), ("updated_at", -1)])
+        await db.alm_push_mappings.create_index("id", unique=True)
+        await db.alm_push_mappings.create_index([("alm_type", 1), ("test_case_id", 1)])
+    except Exception as e:
+        logger.warning(f"Creating ALM indexes failed: {e}")
+    if ALM_SYNC_INTERVAL_SECONDS > 0:
+        app.state.alm_sync_task = asyncio.create_task(alm_manager.sync_periodically(ALM_SYNC_INTERVAL_SECONDS))
+
+@app.on_event("startup")
+async def start_transcript_digester():
+    if TRANSCRIPT_DIGEST_MODE == 'off':
+        return
+    try:
+        await transcript_digester.start(DIGEST_WORKERS)
+    except Exception as e:
+        logger.warning(f"Starting transcript digests failed: {e}")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    alm_sync_task = getattr(app.state, "alm_sync_task", None)
+    if alm_sync_task is not None:
+        alm_sync_task.cancel()
+    await transcript_digester.stop()
+    await alm_manager.close()
+    await ai_manager.close()
     client.close()
\ No newline at end of file
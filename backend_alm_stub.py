@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Local JIRA stand-in for the Gen Studio AI ALM connector
+
+Serves the subset of the JIRA REST API v2 the connector uses over generated
+issues:
+- myself
+- paginated JQL search with project, updated and labels filters
+- bulk issue creation
+
+It enforces basic auth, a server-side page cap, the API user's timezone and
+added latency. To exercise the push pipeline it can also inject:
+- a rate limit answered with 429 and Retry-After
+- per-issue rejections
+- dropped responses, where the issues are created but a 500, 502 or 504
+  is returned
+
+Run it on its own to point a backend at it:
+
+    python backend_alm_stub.py --serve --port 8090 --issues 5000
+
+or let it check a running backend (and its MongoDB, used to seed test cases):
+
+- sync: configure JIRA against the stub, run a full sync, touch some issues,
+  run an incremental sync and verify only the changes were fetched
+- push: seed selected test cases, push them with injected failures, push
+  again and verify every case maps to exactly one created issue
+
+    python backend_alm_stub.py --backend-url http://localhost:8001 --test-cases 2000 --output alm.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from zoneinfo import ZoneInfo
+
+import requests
+from pymongo import MongoClient
+
+ISSUE_TYPES = ["Story", "Bug", "Task", "Epic"]
+STATUSES = ["To Do", "In Progress", "In Review", "Done"]
+PRIORITIES = ["Lowest", "Low", "Medium", "High", "Highest"]
+JIRA_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000+0000"
+
+
+class JiraStubState:
+    """Issues held in memory, plus request counters for checks"""
+
+    def __init__(self, project, issues, username, api_token, time_zone, max_results, latency,
+                 rate_limit=0, reject_rate=0.0, drop_rate=0.0, drop_statuses=(500,)):
+        self.project = project
+        self.username = username
+        self.api_token = api_token
+        self.time_zone = time_zone
+        self.max_results = max_results
+        self.latency = latency
+        self.rate_limit = rate_limit  # bulk create requests per second, 0 for unlimited
+        self.reject_rate = reject_rate
+        self.drop_rate = drop_rate
+        self.drop_statuses = drop_statuses
+        self.window = (0, 0)  # (second, bulk requests seen in it)
+        self.lock = threading.Lock()
+        self.requests = {"myself": 0, "search": 0, "bulk": 0, "rate_limited": 0, "dropped": 0, "rejected": 0}
+        self.created = []
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.issues = {}
+        for number in range(1, issues + 1):
+            key = f"{project}-{number}"
+            # Spread over the last 30 days, and at least an hour old
+            updated = now - timedelta(hours=1) - timedelta(seconds=random.randint(0, 30 * 24 * 3600))
+            self.issues[key] = {
+                "key": key,
+                "summary": f"Requirement {number}: users can manage their profile",
+                "description": f"As a user I want feature {number} so that I can finish my task.\n"
+                               "Acceptance criteria: the form validates every field.",
+                "issuetype": random.choice(ISSUE_TYPES),
+                "status": random.choice(STATUSES),
+                "priority": random.choice(PRIORITIES),
+                "labels": random.sample(["backend", "frontend", "security", "release"], 2),
+                "updated": updated,
+            }
+        self.next_number = issues + 1
+
+    def touch(self, keys, summary_suffix=" (edited)"):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self.lock:
+            for key in keys:
+                self.issues[key]["summary"] += summary_suffix
+                self.issues[key]["updated"] = now
+
+    def rate_limited(self):
+        """Count a bulk request against the per-second limit"""
+        second = int(time.time())
+        with self.lock:
+            self.requests["bulk"] += 1
+            seen = self.window[1] + 1 if self.window[0] == second else 1
+            self.window = (second, seen)
+            if self.rate_limit and seen > self.rate_limit:
+                self.requests["rate_limited"] += 1
+                return True
+        return False
+
+    def bulk_create(self, issue_updates):
+        """Create issues like POST /rest/api/2/issue/bulk; returns (status, body)"""
+        issues, errors = [], []
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self.lock:
+            for index, update in enumerate(issue_updates):
+                fields = update.get("fields", {})
+                if not fields.get("summary") or random.random() < self.reject_rate:
+                    self.requests["rejected"] += 1
+                    errors.append({"status": 400, "failedElementNumber": index,
+                                   "elementErrors": {"errors": {"summary": "Field rejected by the stub"}}})
+                    continue
+                key = f"{self.project}-{self.next_number}"
+                self.next_number += 1
+                self.issues[key] = {
+                    "key": key,
+                    "summary": fields["summary"],
+                    "description": fields.get("description", ""),
+                    "issuetype": fields.get("issuetype", {}).get("name", "Test"),
+                    "status": "To Do",
+                    "priority": "Medium",
+                    "labels": fields.get("labels", []),
+                    "updated": now,
+                }
+                self.created.append(key)
+                issues.append({"id": str(10000 + len(self.created)), "key": key,
+                               "self": f"/rest/api/2/issue/{key}"})
+        # Like JIRA: 400 only when every issue was rejected
+        return (400 if errors and not issues else 201), {"issues": issues, "errors": errors}
+
+    def search(self, jql, start_at, max_results):
+        """Evaluate the project/updated/labels clauses and the ORDER BY key/updated of a JQL query"""
+        with self.lock:
+            issues = list(self.issues.values())
+        project = re.search(r'project\s*=\s*"?([\w-]+)"?', jql)
+        if project and project.group(1) != self.project:
+            issues = []
+        labels = re.search(r'labels\s+in\s*\(([^)]*)\)', jql)
+        if labels:
+            wanted = {label.strip().strip('"') for label in labels.group(1).split(",")}
+            issues = [issue for issue in issues if wanted.intersection(issue["labels"])]
+        updated = re.search(r'updated\s*>=\s*"([^"]+)"', jql)
+        if updated:
+            local = datetime.strptime(updated.group(1), "%Y-%m-%d %H:%M").replace(tzinfo=ZoneInfo(self.time_zone))
+            issues = [issue for issue in issues if issue["updated"] >= local]
+        order = re.search(r'ORDER\s+BY\s+(\w+)\s*(ASC|DESC)?', jql, re.IGNORECASE)
+        field, direction = (order.group(1).lower(), (order.group(2) or "ASC").upper()) if order else ("key", "ASC")
+        if field == "updated":
+            issues.sort(key=lambda issue: (issue["updated"], self.key_number(issue["key"])))
+        else:
+            issues.sort(key=lambda issue: self.key_number(issue["key"]))
+        if direction == "DESC":
+            issues.reverse()
+        page_size = min(max_results, self.max_results)
+        return {
+            "startAt": start_at,
+            "maxResults": page_size,
+            "total": len(issues),
+            "issues": [self.render(issue) for issue in issues[start_at:start_at + page_size]],
+        }
+
+    @staticmethod
+    def key_number(key):
+        """Keys sort like JIRA's: GEN-9 before GEN-10"""
+        return int(key.rsplit("-", 1)[1])
+
+    @staticmethod
+    def render(issue):
+        return {
+            "key": issue["key"],
+            "fields": {
+                "summary": issue["summary"],
+                "description": issue["description"],
+                "issuetype": {"name": issue["issuetype"]},
+                "status": {"name": issue["status"]},
+                "priority": {"name": issue["priority"]},
+                "labels": issue["labels"],
+                "updated": issue["updated"].astimezone(timezone.utc).strftime(JIRA_TIME_FORMAT),
+            },
+        }
+
+
+class JiraStubHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorized(self):
+        expected = base64.b64encode(f"{self.state.username}:{self.state.api_token}".encode()).decode()
+        return self.headers.get("Authorization") == f"Basic {expected}"
+
+    def do_GET(self):
+        if not self.authorized():
+            self.send_json(401, {"errorMessages": ["Unauthorized"]})
+            return
+        time.sleep(self.state.latency)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/rest/api/2/myself":
+            with self.state.lock:
+                self.state.requests["myself"] += 1
+            self.send_json(200, {"name": self.state.username, "timeZone": self.state.time_zone})
+        elif url.path == "/rest/api/2/search":
+            with self.state.lock:
+                self.state.requests["search"] += 1
+            self.send_json(200, self.state.search(
+                query.get("jql", [""])[0],
+                int(query.get("startAt", ["0"])[0]),
+                int(query.get("maxResults", ["50"])[0]),
+            ))
+        else:
+            self.send_json(404, {"errorMessages": [f"No route for {url.path}"]})
+
+    def do_POST(self):
+        if not self.authorized():
+            self.send_json(401, {"errorMessages": ["Unauthorized"]})
+            return
+        time.sleep(self.state.latency)
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if urlparse(self.path).path != "/rest/api/2/issue/bulk":
+            self.send_json(404, {"errorMessages": [f"No route for {self.path}"]})
+            return
+        if self.state.rate_limited():
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        issue_updates = body.get("issueUpdates", [])
+        if len(issue_updates) > 50:
+            self.send_json(400, {"errorMessages": ["At most 50 issues per bulk request"]})
+            return
+        status, payload = self.state.bulk_create(issue_updates)
+        if random.random() < self.state.drop_rate:
+            # Created, but the client never learns the keys
+            with self.state.lock:
+                self.state.requests["dropped"] += 1
+            self.send_json(random.choice(self.state.drop_statuses), {"errorMessages": ["Internal server error"]})
+            return
+        self.send_json(status, payload)
+
+
+def start_stub(args):
+    JiraStubHandler.state = JiraStubState(
+        args.project, args.issues, args.username, args.api_token, args.time_zone, args.max_results, args.latency,
+        args.rate_limit, args.reject_rate, args.drop_rate, args.drop_statuses)
+    server = ThreadingHTTPServer((args.host, args.port), JiraStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, JiraStubHandler.state
+
+
+def check_sync(args, api_url, state, results):
+    """Full then incremental sync through a running backend"""
+    checks = results["checks"]
+    started = time.perf_counter()
+    full = requests.post(f"{api_url}/alm/jira/sync", params={"full": "true"}, timeout=600).json()
+    results["full_sync"] = {**full, "seconds": round(time.perf_counter() - started, 3),
+                            "search_requests": state.requests["search"]}
+    checks["full sync fetched every issue"] = full.get("fetched") == args.issues
+
+    items = requests.get(f"{api_url}/alm/jira/items", params={"limit": 1000}, timeout=30).json()
+    checks["items are served from the cache"] = len(items) == min(args.issues, 1000)
+
+    touched = random.sample(sorted(state.issues), min(args.touch, args.issues))
+    state.touch(touched)
+    search_before = state.requests["search"]
+    started = time.perf_counter()
+    incremental = requests.post(f"{api_url}/alm/jira/sync", timeout=600).json()
+    results["incremental_sync"] = {**incremental, "seconds": round(time.perf_counter() - started, 3),
+                                   "search_requests": state.requests["search"] - search_before}
+    # The overlap window may re-fetch a few issues updated just before the watermark
+    checks["incremental sync fetched only the changes"] = (
+        len(touched) <= incremental.get("fetched", -1) <= len(touched) + max(5, args.issues // 100))
+
+    edited = requests.get(f"{api_url}/alm/jira/items", params={"search": touched[0], "limit": 10}, timeout=30).json()
+    checks["edits reach the cache"] = any(item["key"] == touched[0] and item["title"].endswith("(edited)")
+                                          for item in edited)
+
+
+def check_push(args, api_url, state, results):
+    """Push seeded selected test cases twice with injected failures"""
+    checks = results["checks"]
+    client = MongoClient(args.mongo_url)
+    test_cases = client[args.db_name].test_cases
+    marker = f"alm-stub-{uuid.uuid4()}"
+    now = datetime.utcnow()
+    ids = [str(uuid.uuid4()) for _ in range(args.test_cases)]
+    test_cases.insert_many([{
+        "id": test_case_id,
+        "title": f"Stub push case {number}",
+        "description": "Verify the profile form saves valid input",
+        "preconditions": "User is logged in",
+        "steps": ["Open the profile page", "Edit the name", "Save"],
+        "expected_result": "The new name is shown",
+        "priority": "Medium",
+        "category": "Functional",
+        "created_at": now,
+        "updated_at": now,
+        "is_selected": True,
+        "batch_id": marker,
+    } for number, test_case_id in enumerate(ids)])
+
+    try:
+        runs = []
+        for _ in range(args.push_runs):
+            started = time.perf_counter()
+            response = requests.post(f"{api_url}/alm/jira/push", json={"test_case_ids": ids}, timeout=3600)
+            response.raise_for_status()
+            runs.append({**response.json(), "seconds": round(time.perf_counter() - started, 3)})
+        results["push_runs"] = runs
+        results["push_stub_requests"] = dict(state.requests)
+
+        mappings = requests.get(f"{api_url}/alm/jira/push-mappings", timeout=60).json()
+        pushed = {mapping["test_case_id"]: mapping["alm_key"] for mapping in mappings
+                  if mapping["test_case_id"] in set(ids) and mapping["status"] == "pushed"}
+        created_labels = [label for key in state.created for label in state.issues[key]["labels"]
+                          if label.startswith("genstudio-")]
+        checks["every test case maps to an ALM key"] = len(pushed) == len(ids)
+        checks["no duplicate issues were created"] = (
+            len(state.created) == len(ids) and len(set(created_labels)) == len(created_labels))
+        checks["a rerun after everything is pushed creates nothing"] = runs[-1]["skipped"] == len(ids)
+    finally:
+        test_cases.delete_many({"batch_id": marker})
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serve", action="store_true", help="Only run the stub until interrupted")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--backend-url", default=os.environ.get("BACKEND_URL", "http://localhost:8001"))
+    parser.add_argument("--project", default="GEN")
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument("--touch", type=int, default=25, help="Issues edited before the incremental sync")
+    parser.add_argument("--username", default="qa@example.com")
+    parser.add_argument("--api-token", default="stub-token")
+    parser.add_argument("--time-zone", default="America/Sao_Paulo", help="Timezone JQL dates are read in")
+    parser.add_argument("--max-results", type=int, default=50, help="Server-side cap on the page size")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Connector requests in flight")
+    parser.add_argument("--check", nargs="+", choices=("sync", "push"), default=["sync", "push"])
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default=os.environ.get("DB_NAME", "test_database"),
+                        help="The backend's database, where push test cases are seeded")
+    parser.add_argument("--test-cases", type=int, default=1000, help="Selected test cases to push")
+    parser.add_argument("--push-runs", type=int, default=3, help="Push attempts; later runs retry and reconcile")
+    parser.add_argument("--rate-limit", type=int, default=20, help="Bulk create requests per second before 429s")
+    parser.add_argument("--reject-rate", type=float, default=0.01, help="Share of issues the stub rejects")
+    parser.add_argument("--drop-rate", type=float, default=0.05,
+                        help="Share of bulk requests answered with an error after creating the issues")
+    parser.add_argument("--drop-statuses", default="500,502,504",
+                        type=lambda value: tuple(int(status) for status in value.split(",")),
+                        help="Error statuses dropped responses are answered with, gateway errors included")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    server, state = start_stub(args)
+    stub_url = f"http://{args.host}:{server.server_address[1]}"
+    if args.serve:
+        print(f"🚀 JIRA stub serving {args.issues} {args.project} issues at {stub_url}")
+        print(f"   username={args.username} api_token={args.api_token}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    print(f"🚀 Checking ALM {' and '.join(args.check)} of {args.backend_url} against the JIRA stub at {stub_url}")
+    api_url = f"{args.backend_url.rstrip('/')}/api"
+    response = requests.post(f"{api_url}/alm-configs", json={
+        "alm_type": "jira",
+        "base_url": stub_url,
+        "username": args.username,
+        "api_token": args.api_token,
+        "project_key": args.project,
+        "page_size": 100,
+        "max_concurrency": args.concurrency,
+    }, timeout=30)
+    response.raise_for_status()
+    config_id = response.json()["id"]
+
+    results = {"issues": args.issues, "test_cases": args.test_cases, "checks": {}}
+    try:
+        if "sync" in args.check:
+            check_sync(args, api_url, state, results)
+        if "push" in args.check:
+            check_push(args, api_url, state, results)
+    finally:
+        requests.delete(f"{api_url}/alm-configs/{config_id}", timeout=30)
+
+    for name, ok in results["checks"].items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    for name in ("full_sync", "incremental_sync"):
+        if name in results:
+            sync = results[name]
+            print(f"⏱️  {name}: {sync.get('fetched')} items, {sync['search_requests']} pages in {sync['seconds']}s")
+    for number, run in enumerate(results.get("push_runs", []), start=1):
+        print(f"⏱️  push {number}: {run['pushed']} pushed, {run['reconciled']} reconciled, {run['skipped']} skipped, "
+              f"{run['failed']} failed, {run['pending']} pending in {run['seconds']}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Results written to {args.output}")
+
+    server.shutdown()
+    if all(results["checks"].values()):
+        print("🎉 ALM sync behaves as expected")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
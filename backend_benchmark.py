@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Offline load-test and benchmark suite for Gen Studio AI backend
+
+Boots the FastAPI app with uvicorn against a local MongoDB and a fake
+OpenAI-compatible provider (configured through the openai-compatible adapter), seeds the database in stages (10k/100k/1M test
+cases and transcripts by default) and measures throughput and latency
+percentiles for generation, listing, point lookups, bulk select and exports.
+
+Results are written as JSON so runs can be compared across commits:
+
+    python backend_benchmark.py --sizes 10000 --output bench.json
+    python backend_benchmark.py --sizes 10000 --compare bench.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from pymongo import MongoClient
+
+ROOT_DIR = Path(__file__).parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+# Scenario name -> (share of --requests to issue, share of --concurrency to use)
+SCENARIOS = {
+    "list_test_cases": (0.25, 1.0),
+    "list_transcripts": (0.25, 1.0),
+    "get_test_case": (1.0, 1.0),
+    "bulk_select": (0.5, 1.0),
+    "export_json": (0.1, 0.5),
+    "export_excel": (0.05, 0.5),
+    "generate": (0.25, 1.0),
+    "generate_with_transcripts": (0.25, 1.0),
+}
+CONTEXT_TRANSCRIPTS = 5  # seeded transcripts every generate_with_transcripts request selects
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Answers OpenAI-style chat completion requests with synthetic test cases"""
+
+    latency = 0.5
+    token_rate = 50.0
+    prefill_rate = 5000.0  # uncached prompt tokens processed per second before the first token
+    cache_min_tokens = 1024
+    cached_prefixes = set()  # system prompts seen, like a provider's prefix cache
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        messages = body.get("messages", [])
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        system = "".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+        cached_tokens = 0
+        if len(system) // 4 >= self.cache_min_tokens:
+            if system in self.cached_prefixes:
+                cached_tokens = len(system) // 4
+            self.cached_prefixes.add(system)
+        match = re.search(r"Generate (\d+) (?:detailed )?test cases", prompt)
+        count = int(match.group(1)) if match else 5
+
+        cases = [
+            {
+                "title": f"Synthetic test case {i + 1}",
+                "description": "Generated by the benchmark fake provider",
+                "preconditions": "System is reachable",
+                "steps": ["Open the application", "Perform the action", "Observe the result"],
+                "expected_result": "The action succeeds",
+                "priority": random.choice(["Low", "Medium", "High"]),
+                "category": "Functional",
+            }
+            for i in range(count)
+        ]
+        content = json.dumps(cases)
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if body.get("stream"):
+            self.stream_completion(completion_id, model, content, completion_tokens)
+            return
+
+        time.sleep(self.latency + (prompt_tokens - cached_tokens) / self.prefill_rate
+                   + completion_tokens / self.token_rate)
+        payload = json.dumps({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def stream_completion(self, completion_id, model, content, completion_tokens):
+        """Send the completion as server-sent events paced at the configured token rate"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        time.sleep(self.latency)
+        chunk_chars = 16  # roughly four tokens per chunk
+        pause = (chunk_chars / 4) / self.token_rate
+        for start in range(0, len(content), chunk_chars):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_chars]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(pause)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class GenStudioBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.mongo = MongoClient(args.mongo_url)
+        self.db = self.mongo[args.db_name]
+        self.port = free_port()
+        self.api_url = f"http://127.0.0.1:{self.port}/api"
+        self.server_process = None
+        self.fake_provider = None
+        self.session = requests.Session()
+        self.seeded = 0
+        self.results = []
+
+    # Environment
+    def start_fake_provider(self):
+        FakeProviderHandler.latency = self.args.provider_latency
+        FakeProviderHandler.token_rate = self.args.provider_token_rate
+        FakeProviderHandler.prefill_rate = self.args.provider_prefill_rate
+        self.fake_provider = ThreadingHTTPServer(("127.0.0.1", free_port()), FakeProviderHandler)
+        threading.Thread(target=self.fake_provider.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.fake_provider.server_port}/v1"
+
+    def start_server(self):
+        env = dict(os.environ)
+        env.update({
+            "MONGO_URL": self.args.mongo_url,
+            "DB_NAME": self.args.db_name,
+        })
+        self.server_process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        )
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{self.api_url}/health", timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            if self.server_process.poll() is not None:
+                raise RuntimeError("Backend exited during startup")
+            time.sleep(0.2)
+        raise RuntimeError("Backend did not become healthy within 60s")
+
+    def stop(self):
+        if self.server_process:
+            self.server_process.terminate()
+            self.server_process.wait(timeout=10)
+        if self.fake_provider:
+            self.fake_provider.shutdown()
+        if not self.args.keep_data:
+            self.mongo.drop_database(self.args.db_name)
+
+    # Seeding
+    def seed_to(self, size):
+        """Top the test_cases and transcripts collections up to `size` documents each"""
+        batch = 5000
+        now = datetime.utcnow()
+        while self.seeded < size:
+            count = min(batch, size - self.seeded)
+            test_cases, transcripts = [], []
+            for i in range(self.seeded, self.seeded + count):
+                created = now - timedelta(seconds=i)
+                test_cases.append({
+                    "id": str(uuid.uuid4()),
+                    "title": f"Seeded test case {i}",
+                    "description": "Seeded by the benchmark suite",
+                    "preconditions": "User is logged in",
+                    "steps": ["Navigate to the page", "Fill the form", "Submit"],
+                    "expected_result": "Form is accepted",
+                    "priority": ("Low", "Medium", "High")[i % 3],
+                    "category": "Functional",
+                    "created_at": created,
+                    "updated_at": created,
+                    # A fixed-size selection keeps export cost comparable across sizes
+                    "is_selected": i < self.args.selected,
+                })
+                transcripts.append({
+                    "id": str(uuid.uuid4()),
+                    "title": f"Seeded meeting {i}",
+                    "content": "Speaker: we agreed the login form must lock after five attempts. " * 20,
+                    "meeting_date": None,
+                    "participants": "QA, Dev, PO",
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            self.db.test_cases.insert_many(test_cases, ordered=False)
+            self.db.transcripts.insert_many(transcripts, ordered=False)
+            if not self.seeded:
+                self.context_transcript_ids = [doc["id"] for doc in transcripts[:CONTEXT_TRANSCRIPTS]]
+            self.seeded += count
+        # Seeded transcripts use the pre-preview layout; re-encode them through the server's
+        # store so list and context scenarios measure the current storage layout
+        response = self.session.post(
+            f"{self.api_url}/transcripts/migrate-storage", params={"batch_size": 1000}, timeout=600)
+        response.raise_for_status()
+        self.test_case_ids = [doc["id"] for doc in self.db.test_cases.aggregate(
+            [{"$sample": {"size": 1000}}, {"$project": {"id": 1}}])]
+
+    def configure_provider(self, provider_url):
+        response = self.session.post(f"{self.api_url}/ai-providers", json={
+            "provider": "openai-compatible",
+            "base_url": provider_url,
+            "api_key": "benchmark",
+            "model": "fake-model",
+            "max_tokens": 4000,
+            "temperature": 0.0,
+        }, timeout=10)
+        response.raise_for_status()
+
+    # Scenarios
+    def request_for(self, scenario):
+        if scenario == "list_test_cases":
+            return lambda: self.session.get(f"{self.api_url}/test-cases", timeout=300)
+        if scenario == "list_transcripts":
+            return lambda: self.session.get(f"{self.api_url}/transcripts", timeout=300)
+        if scenario == "get_test_case":
+            return lambda: self.session.get(f"{self.api_url}/test-cases/{random.choice(self.test_case_ids)}", timeout=60)
+        if scenario == "bulk_select":
+            return lambda: self.session.post(
+                f"{self.api_url}/test-cases/bulk-select", json=random.sample(self.test_case_ids, 100), timeout=60)
+        if scenario == "export_json":
+            return lambda: self.session.get(f"{self.api_url}/export/json", timeout=300)
+        if scenario == "export_excel":
+            return lambda: self.session.get(f"{self.api_url}/export/excel", timeout=300)
+        if scenario == "generate":
+            return lambda: self.session.post(f"{self.api_url}/generate-test-cases", data={
+                "prompt": "User can reset their password from the login page",
+                "test_type": "Functional",
+                "num_test_cases": str(self.args.num_test_cases),
+                "selected_transcripts": "[]",
+            }, timeout=600)
+        if scenario == "generate_with_transcripts":
+            # The same context with varying requests, as when one meeting feeds many generations
+            return lambda: self.session.post(f"{self.api_url}/generate-test-cases", data={
+                "prompt": random.choice(["User can reset their password", "Account locks after failed logins",
+                                         "Session expires after inactivity"]),
+                "test_type": "Functional",
+                "num_test_cases": str(self.args.num_test_cases),
+                "selected_transcripts": json.dumps(self.context_transcript_ids),
+            }, timeout=600)
+        raise ValueError(f"Unknown scenario: {scenario}")
+
+    def run_scenario(self, scenario, size):
+        request_share, concurrency_share = SCENARIOS[scenario]
+        total = max(1, int(self.args.requests * request_share))
+        concurrency = max(1, int(self.args.concurrency * concurrency_share))
+        send = self.request_for(scenario)
+
+        def timed_call(_):
+            started = time.perf_counter()
+            try:
+                ok = send().status_code < 400
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed_call, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(duration * 1000 for duration, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        result = {
+            "scenario": scenario,
+            "dataset_size": size,
+            "requests": total,
+            "concurrency": concurrency,
+            "errors": errors,
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(len(latencies) / elapsed, 3) if elapsed else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+            "max_ms": latencies[-1] if latencies else None,
+        }
+        for key in ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms"):
+            if result[key] is not None:
+                result[key] = round(result[key], 3)
+        self.results.append(result)
+
+        status = "✅" if not errors else "⚠️ "
+        print(f"{status} {scenario:<18} n={size:<8} {result['throughput_rps']} req/s "
+              f"p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms errors={errors}")
+        return result
+
+    def run(self):
+        print("🚀 Starting Gen Studio AI Benchmark")
+        self.mongo.drop_database(self.args.db_name)
+        provider_url = self.start_fake_provider()
+        try:
+            self.start_server()
+            self.configure_provider(provider_url)
+            for size in self.args.sizes:
+                print(f"\n🌱 Seeding {size} test cases and transcripts...")
+                self.seed_to(size)
+                for scenario in self.args.scenarios:
+                    self.run_scenario(scenario, size)
+        finally:
+            self.stop()
+        return self.report()
+
+    def report(self):
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": sys.version.split()[0],
+            "config": {
+                "sizes": self.args.sizes,
+                "requests": self.args.requests,
+                "concurrency": self.args.concurrency,
+                "selected": self.args.selected,
+                "num_test_cases": self.args.num_test_cases,
+                "provider_latency": self.args.provider_latency,
+                "provider_token_rate": self.args.provider_token_rate,
+                "provider_prefill_rate": self.args.provider_prefill_rate,
+            },
+            "results": self.results,
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline_path, threshold):
+    """Print p95 deltas against a previous run; return 1 if any scenario regressed past threshold"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["scenario"], r["dataset_size"]): r for r in baseline["results"]}
+    regressed = False
+    print(f"\n📊 Comparing against {baseline_path} (commit {baseline.get('commit')})")
+    for result in report["results"]:
+        before = previous.get((result["scenario"], result["dataset_size"]))
+        if not before or not before["p95_ms"] or result["p95_ms"] is None:
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        flag = "❌" if change > threshold else "  "
+        regressed = regressed or change > threshold
+        print(f"{flag} {result['scenario']:<18} n={result['dataset_size']:<8} "
+              f"p95 {before['p95_ms']}ms -> {result['p95_ms']}ms ({change:+.1%})")
+    return 1 if regressed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--db-name", default="genstudio_benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        type=lambda value: [int(v) for v in value.split(",")])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        type=lambda value: value.split(","))
+    parser.add_argument("--requests", type=int, default=200, help="Base request count per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--selected", type=int, default=1000, help="Seeded test cases marked as selected")
+    parser.add_argument("--num-test-cases", type=int, default=5, help="Test cases requested per generation")
+    parser.add_argument("--provider-latency", type=float, default=0.5, help="Fake provider base latency (s)")
+    parser.add_argument("--provider-token-rate", type=float, default=50.0,
+                        help="Fake provider completion tokens per second")
+    parser.add_argument("--provider-prefill-rate", type=float, default=5000.0,
+                        help="Fake provider uncached prompt tokens per second; cached prefixes are free")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    parser.add_argument("--compare", help="Previous JSON report to compare p95 latencies against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p95 regression ratio")
+    parser.add_argument("--keep-data", action="store_true", help="Do not drop the benchmark database")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main():
+    args = parse_args()
+    report = GenStudioBenchmark(args).run()
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"\n💾 Results written to {args.output}")
+    else:
+        print(output)
+    if args.compare:
+        return compare(report, args.compare, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
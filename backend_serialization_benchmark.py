@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the list endpoints
+
+Times the fast list path in backend/server.py (projected raw documents
+encoded with orjson) against the previous path (a Pydantic model per
+document, then FastAPI's response_model validation and JSON rendering) for
+AIProviderConfig, TestCase and Transcript documents. That both paths produce
+identical JSON is tested in tests/test_serialization.py.
+
+Needs no running MongoDB:
+
+    python backend_serialization_benchmark.py --items 1000 --output serialization.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+ROOT_DIR = Path(__file__).parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "genstudio_serialization_benchmark")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+
+def mongo_datetime(offset_seconds):
+    """A naive UTC datetime with the millisecond precision BSON round-trips"""
+    value = datetime.utcnow() - timedelta(seconds=offset_seconds)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def make_test_case(i):
+    doc = {
+        "_id": uuid.uuid4().hex[:24],
+        "id": str(uuid.uuid4()),
+        "title": f"Test case {i}",
+        "description": "Verify the login form rejects invalid credentials",
+        "preconditions": "User account exists",
+        "steps": [f"Step {n}" for n in range(random.randint(1, 8))],
+        "expected_result": "An error message is shown",
+        "priority": random.choice(["Low", "Medium", "High"]),
+        "category": "Functional",
+        "created_at": mongo_datetime(i),
+        "updated_at": mongo_datetime(i),
+        "is_selected": bool(i % 2),
+    }
+    if i % 10 == 0:
+        # Documents written before is_selected existed
+        del doc["is_selected"]
+    return doc
+
+
+def make_transcript(i):
+    return {
+        "_id": uuid.uuid4().hex[:24],
+        "id": str(uuid.uuid4()),
+        "title": f"Meeting {i}",
+        "content": "Speaker: the export must include every selected case. " * random.randint(1, 50),
+        "meeting_date": None if i % 3 else "2024-05-01",
+        "participants": "QA, Dev",
+        "created_at": mongo_datetime(i),
+        "updated_at": mongo_datetime(i),
+    }
+
+
+def make_ai_provider(i):
+    doc = {
+        "_id": uuid.uuid4().hex[:24],
+        "id": str(uuid.uuid4()),
+        "provider": "openai",
+        "api_key": "sk-test",
+        "model": "gpt-4",
+        "max_tokens": 4000,
+        "temperature": 0.7,
+        "base_url": None,
+        "max_connections": None,
+        "max_keepalive_connections": None,
+        "request_timeout": None,
+        "created_at": mongo_datetime(i),
+        "is_active": i == 0,
+    }
+    if i % 2:
+        # Configs saved before the adapter pool settings were added
+        for field in ("base_url", "max_connections", "max_keepalive_connections", "request_timeout"):
+            del doc[field]
+    return doc
+
+
+CASES = {
+    "ai_providers": (server.AIProviderConfig, server.AI_PROVIDER_PROJECTION, make_ai_provider),
+    "test_cases": (server.TestCase, server.TEST_CASE_PROJECTION, make_test_case),
+    "transcripts": (server.Transcript, server.TRANSCRIPT_PROJECTION, make_transcript),
+}
+
+
+def apply_projection(doc, projection):
+    """What MongoDB returns for find({}, projection)"""
+    return {key: value for key, value in doc.items() if projection.projection.get(key)}
+
+
+def model_path(docs, model, adapter):
+    """The previous list path: build models, validate again via response_model, render JSON"""
+    models = [model(**doc) for doc in docs]
+    content = adapter.dump_python(adapter.validate_python(models), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_path(docs, projection):
+    return server.serialize_documents(docs, projection)
+
+
+def time_per_item(func, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best / items * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    print("🚀 Measuring list serialization cost")
+    report = {"items": args.items, "results": {}}
+    for name, (model, projection, factory) in CASES.items():
+        raw = [factory(i) for i in range(args.items)]
+        adapter = TypeAdapter(List[model])
+        slow_docs = raw
+        fast_docs = [apply_projection(doc, projection) for doc in raw]
+
+        slow_us = time_per_item(lambda: model_path(slow_docs, model, adapter), args.items, args.repeat)
+        fast_us = time_per_item(lambda: fast_path(fast_docs, projection), args.items, args.repeat)
+        report["results"][name] = {
+            "model_path_us_per_item": round(slow_us, 3),
+            "fast_path_us_per_item": round(fast_us, 3),
+            "speedup": round(slow_us / fast_us, 2) if fast_us else None,
+        }
+        print(f"✅ {name:<14} model path {slow_us:8.2f}us/item  fast path {fast_us:6.2f}us/item  "
+              f"({slow_us / fast_us:.1f}x)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    print("🎉 Serialization benchmark complete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
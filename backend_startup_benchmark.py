@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Startup import-time benchmark for Gen Studio AI backend
+
+Imports backend/server.py in fresh interpreters under `python -X importtime`
+and reports the median cumulative import time. It fails (exit code 1) if a
+lazily loaded dependency is imported at module load, or if the median import
+time exceeds the budget:
+
+    python backend_startup_benchmark.py --runs 5 --max-ms 1500 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+# Dependencies server.py must only import on first use
+LAZY_MODULES = ("openai", "anthropic", "google.generativeai", "PyPDF2", "docx", "openpyxl", "httpx")
+
+
+def measure_import():
+    """Import server once in a fresh interpreter; return {module: cumulative_us}"""
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "genstudio_startup_benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing server failed:\n{result.stderr}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=1500.0, help="Budget for the median import time")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to report")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    print(f"🚀 Measuring backend import time over {args.runs} runs")
+    runs = [measure_import() for _ in range(args.runs)]
+    totals_ms = [run["server"] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+
+    eager = sorted(module for module in LAZY_MODULES if any(module in run for run in runs))
+    last = runs[-1]
+    slowest = sorted(
+        ((name, us / 1000) for name, us in last.items() if name != "server" and "." not in name),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+
+    report = {
+        "runs_ms": [round(total, 3) for total in totals_ms],
+        "median_ms": round(median_ms, 3),
+        "budget_ms": args.max_ms,
+        "eagerly_imported": eager,
+        "slowest_imports_ms": {name: round(ms, 3) for name, ms in slowest},
+    }
+
+    print(f"⏱️  Median import time: {median_ms:.1f}ms (budget {args.max_ms:.0f}ms)")
+    for name, ms in slowest:
+        print(f"   {name:<30} {ms:8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+    failed = False
+    if eager:
+        print(f"❌ Imported at module load but expected to be lazy: {', '.join(eager)}")
+        failed = True
+    if median_ms > args.max_ms:
+        print("❌ Median import time is over budget")
+        failed = True
+    if not failed:
+        print("🎉 Startup is within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useDropzone } from 'react-dropzone';
 import { 
@@ -38,6 +38,19 @@ import './App.css';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Generation, uploads and exports are turned away when the backend is at capacity
+const overloadMessage = (error) => {
+  const status = error.response?.status;
+  if (status === 413) {
+    return 'The uploaded files are too large.';
+  }
+  if (status === 429 || status === 503) {
+    const retryAfter = error.response.headers['retry-after'];
+    return `The server is busy. Please try again ${retryAfter ? `in ${retryAfter} seconds` : 'shortly'}.`;
+  }
+  return null;
+};
+
 // Sidebar Navigation Component
 const Sidebar = ({ activeSection, onSectionChange }) => {
   const [isCollapsed, setIsCollapsed] = useState(false);
@@ -97,16 +110,23 @@ const AIProviderConfig = ({ onClose, onSave }) => {
   const [model, setModel] = useState('gpt-4');
   const [maxTokens, setMaxTokens] = useState(4000);
   const [temperature, setTemperature] = useState(0.7);
+  const [baseUrl, setBaseUrl] = useState('');
   const [loading, setLoading] = useState(false);
 
   const providerModels = {
     openai: ['gpt-4', 'gpt-3.5-turbo', 'gpt-4-turbo'],
     anthropic: ['claude-3-opus-20240229', 'claude-3-sonnet-20240229', 'claude-3-haiku-20240307'],
-    google: ['gemini-pro', 'gemini-pro-vision']
+    google: ['gemini-pro', 'gemini-pro-vision'],
+    'openai-compatible': []
   };
+  const isSelfHosted = provider === 'openai-compatible';
 
   const handleSave = async () => {
-    if (!apiKey) {
+    if (isSelfHosted && !baseUrl) {
+      alert('Please enter the server base URL');
+      return;
+    }
+    if (!apiKey && !isSelfHosted) {
       alert('Please enter your API key');
       return;
     }
@@ -115,10 +135,12 @@ const AIProviderConfig = ({ onClose, onSave }) => {
     try {
       await axios.post(`${API}/ai-providers`, {
         provider,
-        api_key: apiKey,
+        // Self-hosted servers usually ignore the key, but the SDK requires one
+        api_key: apiKey || 'not-needed',
         model,
         max_tokens: maxTokens,
-        temperature
+        temperature,
+        base_url: isSelfHosted ? baseUrl : null
       });
       onSave();
       onClose();
@@ -148,16 +170,32 @@ const AIProviderConfig = ({ onClose, onSave }) => {
               value={provider}
               onChange={(e) => {
                 setProvider(e.target.value);
-                setModel(providerModels[e.target.value][0]);
+                setModel(providerModels[e.target.value][0] || '');
               }}
               className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
             >
               <option value="openai">OpenAI</option>
               <option value="anthropic">Anthropic Claude</option>
               <option value="google">Google Gemini</option>
+              <option value="openai-compatible">OpenAI-compatible (self-hosted)</option>
             </select>
           </div>
 
+          {isSelfHosted && (
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-2">
+                Base URL
+              </label>
+              <input
+                type="text"
+                value={baseUrl}
+                onChange={(e) => setBaseUrl(e.target.value)}
+                className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
+                placeholder="http://localhost:8000/v1"
+              />
+            </div>
+          )}
+
           <div>
             <label className="block text-sm font-medium text-gray-700 mb-2">
               API Key
@@ -167,7 +205,7 @@ const AIProviderConfig = ({ onClose, onSave }) => {
               value={apiKey}
               onChange={(e) => setApiKey(e.target.value)}
               className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
-              placeholder="Enter your API key"
+              placeholder={isSelfHosted ? 'Optional for self-hosted servers' : 'Enter your API key'}
             />
           </div>
 
@@ -175,15 +213,25 @@ const AIProviderConfig = ({ onClose, onSave }) => {
             <label className="block text-sm font-medium text-gray-700 mb-2">
               Model
             </label>
-            <select
-              value={model}
-              onChange={(e) => setModel(e.target.value)}
-              className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
-            >
-              {providerModels[provider].map(m => (
-                <option key={m} value={m}>{m}</option>
-              ))}
-            </select>
+            {isSelfHosted ? (
+              <input
+                type="text"
+                value={model}
+                onChange={(e) => setModel(e.target.value)}
+                className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
+                placeholder="Model name served by the endpoint"
+              />
+            ) : (
+              <select
+                value={model}
+                onChange={(e) => setModel(e.target.value)}
+                className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
+              >
+                {providerModels[provider].map(m => (
+                  <option key={m} value={m}>{m}</option>
+                ))}
+              </select>
+            )}
           </div>
 
           <div>
@@ -244,9 +292,29 @@ const Dashboard = ({ transcripts, onGenerate }) => {
   const [numTestCases, setNumTestCases] = useState(5);
   const [files, setFiles] = useState([]);
   const [selectedTranscripts, setSelectedTranscripts] = useState([]);
+  const [useTranscriptDigests, setUseTranscriptDigests] = useState(true);
   const [selectedALM, setSelectedALM] = useState('');
   const [selectedALMItems, setSelectedALMItems] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [batchFile, setBatchFile] = useState(null);
+  const [batchProgress, setBatchProgress] = useState(null);
+  const [batchRunning, setBatchRunning] = useState(false);
+  const [almItems, setAlmItems] = useState([]);
+
+  // Items come from the backend's local ALM cache, kept current by its sync
+  useEffect(() => {
+    setSelectedALMItems([]);
+    if (!selectedALM) {
+      setAlmItems([]);
+      return;
+    }
+    axios.get(`${API}/alm/${selectedALM}/items`)
+      .then(response => setAlmItems(response.data))
+      .catch(error => {
+        console.error('Failed to load ALM items:', error);
+        setAlmItems([]);
+      });
+  }, [selectedALM]);
 
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     accept: {
@@ -276,6 +344,7 @@ const Dashboard = ({ transcripts, onGenerate }) => {
       formData.append('test_type', testType);
       formData.append('num_test_cases', numTestCases.toString());
       formData.append('selected_transcripts', JSON.stringify(selectedTranscripts));
+      formData.append('use_transcript_digests', useTranscriptDigests.toString());
       formData.append('selected_alm', selectedALM);
       formData.append('selected_alm_items', JSON.stringify(selectedALMItems));
       
@@ -296,12 +365,75 @@ const Dashboard = ({ transcripts, onGenerate }) => {
       setSelectedALMItems([]);
     } catch (error) {
       console.error('Generation failed:', error);
-      alert('Failed to generate test cases. Please check your AI provider configuration.');
+      alert(overloadMessage(error) || 'Failed to generate test cases. Please check your AI provider configuration.');
     } finally {
       setLoading(false);
     }
   };
 
+  const handleBatchGenerate = async () => {
+    if (!batchFile) {
+      return;
+    }
+
+    setBatchRunning(true);
+    setBatchProgress({ done: 0, total: 0, failed: 0, generated: 0 });
+    try {
+      const formData = new FormData();
+      formData.append('requirements_file', batchFile);
+      formData.append('test_type', testType);
+      formData.append('num_test_cases', numTestCases.toString());
+      formData.append('selected_transcripts', JSON.stringify(selectedTranscripts));
+      formData.append('use_transcript_digests', useTranscriptDigests.toString());
+
+      // axios can't read a streamed body in the browser, so use fetch for the NDJSON progress events
+      const response = await fetch(`${API}/generate-test-cases/batch`, {
+        method: 'POST',
+        body: formData
+      });
+      if (!response.ok) {
+        const error = await response.json().catch(() => ({}));
+        throw new Error(error.detail || `HTTP ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffered = '';
+      const handleEvent = (event) => {
+        if (event.event === 'started') {
+          setBatchProgress({ done: 0, total: event.total, failed: 0, generated: 0 });
+        } else if (event.event === 'requirement') {
+          const generated = event.test_cases ? event.test_cases.length : 0;
+          setBatchProgress(prev => ({
+            ...prev,
+            done: event.done,
+            failed: prev.failed + (event.status === 'failed' ? 1 : 0),
+            generated: prev.generated + generated
+          }));
+          if (generated) {
+            onGenerate(event.test_cases);
+          }
+        }
+      };
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) {
+          break;
+        }
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)));
+      }
+      setBatchFile(null);
+    } catch (error) {
+      console.error('Batch generation failed:', error);
+      alert(`Batch generation failed: ${error.message}`);
+    } finally {
+      setBatchRunning(false);
+    }
+  };
+
   return (
     <div className="space-y-6">
       <div className="bg-white rounded-lg shadow p-6">
@@ -338,11 +470,35 @@ const Dashboard = ({ transcripts, onGenerate }) => {
               <option value="jira">JIRA</option>
               <option value="azure">Azure DevOps</option>
             </select>
-            {selectedALM && (
+            {selectedALM && almItems.length === 0 && (
               <p className="text-sm text-gray-500 mt-1">
                 Configure your {selectedALM.toUpperCase()} connection in ALM Configuration to see available items.
               </p>
             )}
+            {selectedALM && almItems.length > 0 && (
+              <div className="border border-gray-300 rounded-md p-3 mt-2 max-h-40 overflow-y-auto">
+                {almItems.map((item) => (
+                  <div key={item.id} className="flex items-center space-x-2 mb-2">
+                    <input
+                      type="checkbox"
+                      id={item.id}
+                      checked={selectedALMItems.includes(item.key)}
+                      onChange={(e) => {
+                        if (e.target.checked) {
+                          setSelectedALMItems([...selectedALMItems, item.key]);
+                        } else {
+                          setSelectedALMItems(selectedALMItems.filter(key => key !== item.key));
+                        }
+                      }}
+                      className="rounded border-gray-300 text-blue-600 focus:ring-blue-500"
+                    />
+                    <label htmlFor={item.id} className="text-sm text-gray-700 cursor-pointer">
+                      {item.key} - {item.title}{item.status ? ` (${item.status})` : ''}
+                    </label>
+                  </div>
+                ))}
+              </div>
+            )}
           </div>
 
           {/* Meeting Transcripts Selection */}
@@ -376,6 +532,17 @@ const Dashboard = ({ transcripts, onGenerate }) => {
                 ))
               )}
             </div>
+            {transcripts.length > 0 && (
+              <label className="flex items-center space-x-2 mt-2 text-sm text-gray-700">
+                <input
+                  type="checkbox"
+                  checked={useTranscriptDigests}
+                  onChange={(e) => setUseTranscriptDigests(e.target.checked)}
+                  className="rounded border-gray-300 text-blue-600 focus:ring-blue-500"
+                />
+                <span>Use transcript digests (send the full transcript when unchecked)</span>
+              </label>
+            )}
           </div>
 
           <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
@@ -461,6 +628,57 @@ const Dashboard = ({ transcripts, onGenerate }) => {
           </button>
         </div>
       </div>
+
+      <div className="bg-white rounded-lg shadow p-6">
+        <div className="flex items-center space-x-2 mb-4">
+          <FileText className="text-blue-600" size={24} />
+          <h2 className="text-xl font-bold text-gray-800">Batch Generation</h2>
+        </div>
+
+        <div className="space-y-4">
+          <div>
+            <label className="block text-sm font-medium text-gray-700 mb-2">
+              Requirements File
+            </label>
+            <input
+              type="file"
+              accept=".csv,.xlsx,.json"
+              onChange={(e) => setBatchFile(e.target.files[0] || null)}
+              className="w-full text-sm text-gray-700"
+            />
+            <p className="text-xs text-gray-500 mt-1">
+              One requirement per row (.csv, .xlsx) or item (.json) with optional id, test_type and num_test_cases columns. Test type, number of test cases and transcripts selected above are the defaults.
+            </p>
+          </div>
+
+          {batchProgress && (
+            <div>
+              <div className="flex justify-between text-sm text-gray-700 mb-1">
+                <span>{batchProgress.done} / {batchProgress.total} requirements</span>
+                <span>
+                  {batchProgress.generated} test cases
+                  {batchProgress.failed > 0 && `, ${batchProgress.failed} failed`}
+                </span>
+              </div>
+              <div className="w-full bg-gray-200 rounded-full h-2">
+                <div
+                  className="bg-blue-600 h-2 rounded-full transition-all"
+                  style={{ width: `${batchProgress.total ? (batchProgress.done / batchProgress.total) * 100 : 0}%` }}
+                />
+              </div>
+            </div>
+          )}
+
+          <button
+            onClick={handleBatchGenerate}
+            disabled={batchRunning || !batchFile}
+            className="w-full bg-blue-600 text-white py-3 px-4 rounded-md hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed flex items-center justify-center space-x-2"
+          >
+            {batchRunning ? <RefreshCw size={16} className="animate-spin" /> : <Upload size={16} />}
+            <span>{batchRunning ? 'Generating...' : 'Generate for All Requirements'}</span>
+          </button>
+        </div>
+      </div>
     </div>
   );
 };
@@ -539,13 +757,60 @@ const ALMConfigPage = () => {
   const [jiraConfig, setJiraConfig] = useState({
     url: '',
     username: '',
-    apiToken: ''
+    apiToken: '',
+    projectKey: ''
   });
   const [azureConfig, setAzureConfig] = useState({
     organization: '',
     project: '',
     patToken: ''
   });
+  const [saving, setSaving] = useState(false);
+  const [syncing, setSyncing] = useState(false);
+  const [syncResult, setSyncResult] = useState(null);
+
+  const handleSync = async (full = false) => {
+    setSyncing(true);
+    try {
+      const response = await axios.post(`${API}/alm/${selectedALM}/sync`, null, { params: { full } });
+      setSyncResult(response.data);
+    } catch (error) {
+      console.error('ALM sync failed:', error);
+      alert(`ALM sync failed: ${error.response?.data?.detail || error.message}`);
+    } finally {
+      setSyncing(false);
+    }
+  };
+
+  const handleSave = async () => {
+    if (selectedALM !== 'jira') {
+      alert('Only JIRA can be synced for now.');
+      return;
+    }
+    if (!jiraConfig.url || !jiraConfig.apiToken) {
+      alert('Please enter the JIRA URL and API token');
+      return;
+    }
+
+    setSaving(true);
+    try {
+      await axios.post(`${API}/alm-configs`, {
+        alm_type: 'jira',
+        base_url: jiraConfig.url,
+        username: jiraConfig.username,
+        api_token: jiraConfig.apiToken,
+        project_key: jiraConfig.projectKey || null
+      });
+    } catch (error) {
+      console.error('Failed to save ALM configuration:', error);
+      alert('Failed to save ALM configuration');
+      return;
+    } finally {
+      setSaving(false);
+    }
+    // A new configuration starts with an empty cache
+    await handleSync(true);
+  };
 
   return (
     <div className="space-y-6">
@@ -611,6 +876,18 @@ const ALMConfigPage = () => {
                     placeholder="Your JIRA API token"
                   />
                 </div>
+                <div>
+                  <label className="block text-sm font-medium text-gray-700 mb-1">
+                    Project Key (Optional)
+                  </label>
+                  <input
+                    type="text"
+                    value={jiraConfig.projectKey}
+                    onChange={(e) => setJiraConfig({...jiraConfig, projectKey: e.target.value})}
+                    className="w-full p-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500"
+                    placeholder="PROJ"
+                  />
+                </div>
               </div>
             </div>
           )}
@@ -659,13 +936,30 @@ const ALMConfigPage = () => {
             </div>
           )}
 
-          <div className="flex justify-end">
+          {syncResult && (
+            <p className="text-sm text-gray-600">
+              Last sync ({syncResult.mode}): {syncResult.fetched} items fetched, {syncResult.inserted} new, {syncResult.updated} updated.
+            </p>
+          )}
+
+          <div className="flex justify-end space-x-2">
+            {selectedALM === 'jira' && (
+              <button
+                onClick={() => handleSync(false)}
+                disabled={syncing || saving}
+                className="px-4 py-2 border border-gray-300 text-gray-700 rounded-md hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed flex items-center space-x-2"
+              >
+                <RefreshCw size={16} className={syncing ? 'animate-spin' : ''} />
+                <span>{syncing ? 'Syncing...' : 'Sync Now'}</span>
+              </button>
+            )}
             <button
-              disabled={!selectedALM}
+              onClick={handleSave}
+              disabled={!selectedALM || saving || syncing}
               className="px-4 py-2 bg-blue-600 text-white rounded-md hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed flex items-center space-x-2"
             >
               <Save size={16} />
-              <span>Save Configuration</span>
+              <span>{saving ? 'Saving...' : 'Save Configuration'}</span>
             </button>
           </div>
         </div>
@@ -718,7 +1012,7 @@ const TranscriptionPage = ({ transcripts, onTranscriptsUpdate }) => {
       alert('Transcripts uploaded successfully!');
     } catch (error) {
       console.error('Upload failed:', error);
-      alert('Failed to upload transcripts');
+      alert(overloadMessage(error) || 'Failed to upload transcripts');
     } finally {
       setUploading(false);
     }
@@ -905,6 +1199,9 @@ const TranscriptionPage = ({ transcripts, onTranscriptsUpdate }) => {
                 </p>
                 <div className="text-xs text-gray-500 mt-2">
                   Added: {new Date(transcript.created_at).toLocaleDateString()}
+                  {transcript.digest_status === 'ready' && <span className="ml-4">✅ Digest ready</span>}
+                  {['pending', 'running'].includes(transcript.digest_status) && <span className="ml-4">⏳ Digest pending</span>}
+                  {transcript.digest_status === 'failed' && <span className="ml-4">⚠️ Digest failed, full transcript is used</span>}
                 </div>
               </div>
             ))}
@@ -1189,7 +1486,27 @@ const TestCasesPage = ({ testCases, onTestCasesUpdate }) => {
       link.remove();
       window.URL.revokeObjectURL(url);
     } catch (error) {
-      alert('Failed to export test cases. Please select some test cases first.');
+      alert(overloadMessage(error) || 'Failed to export test cases. Please select some test cases first.');
+    }
+  };
+
+  const [pushing, setPushing] = useState(false);
+
+  const handlePushToALM = async () => {
+    setPushing(true);
+    try {
+      const response = await axios.post(`${API}/alm/jira/push`);
+      const result = response.data;
+      let message = `Pushed ${result.pushed} test cases to JIRA`;
+      if (result.reconciled) message += `, matched ${result.reconciled} already created`;
+      if (result.skipped) message += `, skipped ${result.skipped} pushed before`;
+      if (result.failed || result.pending) message += `. ${result.failed + result.pending} could not be pushed; run the push again to retry them`;
+      alert(message);
+    } catch (error) {
+      console.error('ALM push failed:', error);
+      alert(`Failed to push test cases: ${error.response?.data?.detail || error.message}`);
+    } finally {
+      setPushing(false);
     }
   };
 
@@ -1240,6 +1557,14 @@ const TestCasesPage = ({ testCases, onTestCasesUpdate }) => {
               <Download size={16} />
               <span>Export Excel</span>
             </button>
+            <button
+              onClick={handlePushToALM}
+              disabled={selectedCount === 0 || pushing}
+              className="flex items-center space-x-2 px-4 py-2 bg-blue-600 text-white rounded-md hover:bg-blue-700 disabled:opacity-50 disabled:cursor-not-allowed"
+            >
+              {pushing ? <RefreshCw size={16} className="animate-spin" /> : <Upload size={16} />}
+              <span>{pushing ? 'Pushing...' : 'Push to JIRA'}</span>
+            </button>
             <button
               onClick={handleClearAll}
               disabled={testCases.length === 0}
@@ -1275,12 +1600,31 @@ const TestCasesPage = ({ testCases, onTestCasesUpdate }) => {
   );
 };
 
+// Apply a /test-cases?since= delta: replace changed cases in place, prepend new ones, drop deleted ones
+const mergeTestCaseDelta = (current, delta) => {
+  if (delta.full) {
+    return delta.items;
+  }
+  const changed = new Map(delta.items.map(tc => [tc.id, tc]));
+  const deleted = new Set(delta.deleted);
+  const merged = current
+    .filter(tc => !deleted.has(tc.id))
+    .map(tc => {
+      const updated = changed.get(tc.id);
+      changed.delete(tc.id);
+      return updated || tc;
+    });
+  // Whatever is left was created since the last sync; the server sends newest first
+  return [...changed.values(), ...merged];
+};
+
 // Main App Component
 function App() {
   const [activeSection, setActiveSection] = useState('dashboard');
   const [testCases, setTestCases] = useState([]);
   const [transcripts, setTranscripts] = useState([]);
   const [activeProvider, setActiveProvider] = useState(null);
+  const testCasesSyncToken = useRef(null);
 
   // Load data
   useEffect(() => {
@@ -1291,8 +1635,14 @@ function App() {
 
   const loadTestCases = async () => {
     try {
-      const response = await axios.get(`${API}/test-cases`);
-      setTestCases(response.data);
+      const since = testCasesSyncToken.current;
+      const response = await axios.get(`${API}/test-cases`, { params: since ? { since } : {} });
+      testCasesSyncToken.current = response.headers['x-sync-token'] || null;
+      if (since) {
+        setTestCases(prev => mergeTestCaseDelta(prev, response.data));
+      } else {
+        setTestCases(response.data);
+      }
     } catch (error) {
       console.error('Failed to load test cases:', error);
     }
@@ -0,0 +1,32 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR / "backend"))
+# server.py reads these at import; the client connects lazily, so no MongoDB is needed
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "genstudio_tests")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """An in-memory database in place of server.db"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    import server
+
+    database = mongomock_motor.AsyncMongoMockClient()["genstudio_tests"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+@pytest.fixture
+def api(db):
+    """A TestClient for the app, started against the in-memory database"""
+    from fastapi.testclient import TestClient
+    import server
+
+    with TestClient(server.app) as client:
+        yield client
@@ -0,0 +1,213 @@
+"""Admission control: slots, the bounded queue, the shared memory budget and rejections"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+def make_gate(name="work", path="/work", concurrency=1, queue_size=1, base_memory_mb=10):
+    return server.AdmissionGate(name, "POST", path, concurrency=concurrency, queue_size=queue_size,
+                                max_body_mb=1, base_memory_mb=base_memory_mb, body_memory_factor=0)
+
+
+def held_app(release: asyncio.Event, fail: bool = False):
+    """An ASGI app that answers /work once release is set, or raises if fail; other paths answer at once"""
+    async def app(scope, receive, send):
+        if scope["path"] == "/work":
+            await release.wait()
+        if fail:
+            raise RuntimeError("handler failed")
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def client_for(app):
+    transport = httpx.ASGITransport(app=server.AdmissionControlMiddleware(app))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def wait_until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    gate = make_gate()
+    monkeypatch.setattr(server, "admission", server.AdmissionController([gate], 100 * server.MB))
+    return gate
+
+
+def test_full_queue_is_rejected_with_429(gate):
+    async def scenario():
+        release = asyncio.Event()
+        async with client_for(held_app(release)) as client:
+            running = asyncio.create_task(client.post("/work"))
+            queued = asyncio.create_task(client.post("/work"))
+            await wait_until(lambda: gate.active == 1 and gate.waiting == 1)
+
+            rejected = await client.post("/work")
+            release.set()
+            return rejected, await running, await queued
+
+    rejected, running, queued = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert int(rejected.headers["retry-after"]) >= 1
+    assert (running.status_code, queued.status_code) == (200, 200)
+    assert server.admission.memory_reserved == 0 and gate.active == 0
+
+
+def test_queue_timeout_is_rejected_with_503(gate, monkeypatch):
+    monkeypatch.setattr(server, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        release = asyncio.Event()
+        async with client_for(held_app(release)) as client:
+            running = asyncio.create_task(client.post("/work"))
+            await wait_until(lambda: gate.active == 1)
+            timed_out = await client.post("/work")
+            release.set()
+            return timed_out, await running
+
+    timed_out, running = asyncio.run(scenario())
+    assert timed_out.status_code == 503
+    assert "retry-after" in timed_out.headers
+    assert running.status_code == 200
+    assert gate.waiting == 0
+
+
+def test_slot_and_memory_are_released_when_the_handler_raises(gate):
+    async def scenario():
+        release = asyncio.Event()
+        release.set()
+        async with client_for(held_app(release, fail=True)) as client:
+            with pytest.raises(RuntimeError):
+                await client.post("/work")
+
+    asyncio.run(scenario())
+    assert gate.active == 0
+    assert server.admission.memory_reserved == 0
+
+
+def test_oversized_body_is_rejected_before_admission(gate):
+    async def scenario():
+        async with client_for(held_app(asyncio.Event())) as client:
+            return await client.post("/work", content=b"x" * (2 * server.MB))
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 413
+    assert gate.active == 0
+
+
+def test_other_endpoints_bypass_full_gates(gate):
+    async def scenario():
+        release = asyncio.Event()
+        async with client_for(held_app(release)) as client:
+            running = asyncio.create_task(client.post("/work"))
+            queued = asyncio.create_task(client.post("/work"))
+            await wait_until(lambda: gate.active == 1 and gate.waiting == 1)
+            other = await client.post("/health")
+            release.set()
+            await asyncio.gather(running, queued)
+            return other
+
+    assert asyncio.run(scenario()).status_code == 200
+
+
+def test_memory_budget_is_shared_across_gates():
+    exports = make_gate("exports", "/exports", concurrency=4, base_memory_mb=60)
+    uploads = make_gate("uploads", "/uploads", concurrency=4, base_memory_mb=60)
+    controller = server.AdmissionController([exports, uploads], 100 * server.MB)
+
+    async def scenario():
+        memory = exports.memory_needed(0)
+        assert await controller.acquire(exports, memory) is None
+        waiting = asyncio.create_task(controller.acquire(uploads, uploads.memory_needed(0)))
+        await wait_until(lambda: uploads.waiting == 1)
+        assert not waiting.done()
+
+        await controller.release(exports, memory)
+        return await waiting
+
+    assert asyncio.run(scenario()) is None
+    assert uploads.active == 1
+    assert controller.memory_reserved == 60 * server.MB
+
+
+def test_memory_estimate_never_exceeds_the_budget():
+    gate = server.AdmissionGate("big", "POST", "/big", concurrency=1, queue_size=0,
+                                max_body_mb=0, base_memory_mb=10, body_memory_factor=1000)
+    assert gate.memory_needed(10 * server.MB) == server.ADMISSION_MEMORY_BUDGET_BYTES
+
+
+def test_newcomer_does_not_overtake_a_queued_request():
+    gate = make_gate(queue_size=2)
+    controller = server.AdmissionController([gate], 100 * server.MB)
+
+    async def scenario():
+        memory = gate.memory_needed(0)
+        assert await controller.acquire(gate, memory) is None
+        queued = asyncio.create_task(controller.acquire(gate, memory))
+        await wait_until(lambda: gate.waiting == 1)
+
+        await controller.release(gate, memory)
+        newcomer = asyncio.create_task(controller.acquire(gate, memory))
+        assert await queued is None
+        await asyncio.sleep(0)
+        assert not newcomer.done()
+        assert (gate.active, gate.waiting) == (1, 1)
+
+        await controller.release(gate, memory)
+        return await newcomer
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_large_request_is_not_starved_by_small_ones():
+    small = make_gate("small", "/small", concurrency=10, queue_size=10, base_memory_mb=20)
+    large = make_gate("large", "/large", concurrency=1, queue_size=1, base_memory_mb=90)
+    controller = server.AdmissionController([small, large], 100 * server.MB)
+
+    async def scenario():
+        small_memory, large_memory = small.memory_needed(0), large.memory_needed(0)
+        assert await controller.acquire(small, small_memory) is None
+        assert await controller.acquire(small, small_memory) is None
+        waiting_large = asyncio.create_task(controller.acquire(large, large_memory))
+        await wait_until(lambda: large.waiting == 1)
+
+        # Memory is free for a small request, but the large one is ahead of it
+        later_small = asyncio.create_task(controller.acquire(small, small_memory))
+        await wait_until(lambda: small.waiting == 1)
+
+        await controller.release(small, small_memory)
+        await controller.release(small, small_memory)
+        assert await waiting_large is None
+        await asyncio.sleep(0)
+        assert not later_small.done()
+
+        await controller.release(large, large_memory)
+        return await later_small
+
+    assert asyncio.run(scenario()) is None
+    assert controller.memory_reserved == 20 * server.MB
+
+
+def test_a_waiter_that_times_out_unblocks_those_behind_it(monkeypatch):
+    monkeypatch.setattr(server, "ADMISSION_QUEUE_TIMEOUT_SECONDS", 0.05)
+    small = make_gate("small", "/small", concurrency=10, queue_size=10, base_memory_mb=20)
+    large = make_gate("large", "/large", concurrency=1, queue_size=1, base_memory_mb=90)
+    controller = server.AdmissionController([small, large], 100 * server.MB)
+
+    async def scenario():
+        assert await controller.acquire(small, small.memory_needed(0)) is None
+        waiting_large = asyncio.create_task(controller.acquire(large, large.memory_needed(0)))
+        await wait_until(lambda: large.waiting == 1)
+        later_small = asyncio.create_task(controller.acquire(small, small.memory_needed(0)))
+        return await waiting_large, await later_small
+
+    assert asyncio.run(scenario()) == ("queue_timeout", None)
+    assert small.active == 2 and large.active == 0
@@ -0,0 +1,25 @@
+"""Provider adapters are cached per configuration and closed once it is replaced"""
+
+import server
+
+
+class RecordingAdapter(server.ProviderAdapter):
+    closed = []
+
+    async def aclose(self):
+        self.closed.append(self.config.id)
+
+
+def test_saving_a_provider_closes_the_replaced_adapters(api, monkeypatch):
+    monkeypatch.setitem(server.PROVIDER_ADAPTERS, "recording", RecordingAdapter)
+    monkeypatch.setattr(RecordingAdapter, "closed", [])
+    config = {"provider": "recording", "api_key": "key", "model": "model"}
+
+    first = server.AIProviderConfig(**api.post("/api/ai-providers", json=config).json())
+    adapter = server.ai_manager.get_adapter(first)
+    assert server.ai_manager.get_adapter(first) is adapter
+
+    second = server.AIProviderConfig(**api.post("/api/ai-providers", json=config).json())
+    assert RecordingAdapter.closed == [first.id]
+    assert first.id not in server.ai_manager.providers
+    assert server.ai_manager.get_adapter(second) is not adapter
@@ -0,0 +1,158 @@
+"""JIRA sync and push against the in-process stub in backend_alm_stub.py"""
+
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import server
+
+backend_alm_stub = pytest.importorskip("backend_alm_stub")
+
+ISSUES = 120
+
+
+@pytest.fixture
+def jira():
+    state = backend_alm_stub.JiraStubState("GEN", ISSUES, "qa@example.com", "stub-token", "Europe/Berlin",
+                                           max_results=50, latency=0.0)
+    backend_alm_stub.JiraStubHandler.state = state
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), backend_alm_stub.JiraStubHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield state
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def configured(api, jira):
+    response = api.post("/api/alm-configs", json={
+        "alm_type": "jira", "base_url": jira.url, "username": "qa@example.com", "api_token": "stub-token",
+        "project_key": "GEN", "page_size": 100, "max_concurrency": 4, "push_batch_size": 10,
+    })
+    assert response.status_code == 200
+    return jira
+
+
+def cached_items(api):
+    return {item["key"]: item for item in api.get("/api/alm/jira/items", params={"limit": 1000}).json()}
+
+
+def test_full_then_incremental_sync(api, configured):
+    full = api.post("/api/alm/jira/sync", params={"full": "true"}).json()
+    assert (full["mode"], full["fetched"]) == ("full", ISSUES)
+    assert len(cached_items(api)) == ISSUES
+
+    touched = ["GEN-3", "GEN-77"]
+    configured.touch(touched)
+    searches = configured.requests["search"]
+    incremental = api.post("/api/alm/jira/sync").json()
+    assert incremental["mode"] == "incremental"
+    # The overlap window only re-reads issues updated just before the watermark
+    assert len(touched) <= incremental["fetched"] <= len(touched) + 5
+    assert configured.requests["search"] - searches == 1
+
+    items = cached_items(api)
+    assert all(items[key]["title"].endswith("(edited)") for key in touched)
+    watermark = datetime.fromisoformat(incremental["sync_watermark"])
+    assert watermark <= datetime.utcnow()
+
+
+def test_edits_during_a_sync_do_not_restart_it(api, configured):
+    search = configured.search
+
+    def search_and_edit(jql, start_at, max_results):
+        if start_at == 0:
+            configured.touch(["GEN-1"])  # moves to the end of an updated ordering
+        return search(jql, start_at, max_results)
+
+    configured.search = search_and_edit
+    full = api.post("/api/alm/jira/sync", params={"full": "true"}).json()
+    assert full["fetched"] == ISSUES
+    assert configured.requests["search"] == ISSUES // 50 + 1
+    assert len(cached_items(api)) == ISSUES
+
+
+def test_issues_deleted_during_a_sync_trigger_another_pass(api, configured):
+    search = configured.search
+    deleted = []
+
+    def search_and_delete(jql, start_at, max_results):
+        if start_at == 50 and not deleted:
+            # After the first page was read: every later offset shifts by one
+            deleted.append("GEN-1")
+            with configured.lock:
+                del configured.issues["GEN-1"]
+        return search(jql, start_at, max_results)
+
+    configured.search = search_and_delete
+    full = api.post("/api/alm/jira/sync", params={"full": "true"}).json()
+    pages = ISSUES // 50 + 1
+    assert configured.requests["search"] == 2 * pages
+    assert set(cached_items(api)) >= {f"GEN-{number}" for number in range(2, ISSUES + 1)}
+    # Both passes miss the deleted issue: 50 + 69 items, then 119
+    assert full["fetched"] == 2 * (ISSUES - 1)
+
+
+def seed_test_cases(api, count, untitled=()):
+    docs = [server.TestCase(id=f"case-{number}", title="" if number in untitled else f"Case {number}",
+                            description="", preconditions="", steps=["Open the page"], expected_result="It opens",
+                            is_selected=True).dict()
+            for number in range(count)]
+    api.portal.call(server.db.test_cases.insert_many, docs)
+    return [doc["id"] for doc in docs]
+
+
+def mappings(api):
+    return {mapping["test_case_id"]: mapping for mapping in api.get("/api/alm/jira/push-mappings").json()}
+
+
+@pytest.mark.parametrize("drop_status", [502, 504])
+def test_push_reconciles_dropped_responses_without_duplicates(api, configured, drop_status):
+    ids = seed_test_cases(api, 25)
+    configured.drop_rate, configured.drop_statuses = 1.0, (drop_status,)
+
+    first = api.post("/api/alm/jira/push", json={"test_case_ids": ids}).json()
+    # Gateway errors may follow a successful create, so they are not retried
+    assert (first["pending"], first["pushed"], first["batches"]) == (25, 0, 3)
+    assert configured.requests["bulk"] == 3
+    assert len(configured.created) == 25
+    assert {mapping["status"] for mapping in mappings(api).values()} == {"pending"}
+
+    configured.drop_rate = 0.0
+    second = api.post("/api/alm/jira/push", json={"test_case_ids": ids}).json()
+    assert (second["reconciled"], second["pushed"], second["pending"]) == (25, 0, 0)
+    assert len(configured.created) == 25
+
+    third = api.post("/api/alm/jira/push", json={"test_case_ids": ids}).json()
+    assert (third["skipped"], third["batches"]) == (25, 0)
+    assert configured.requests["bulk"] == 3
+
+    recorded = mappings(api)
+    assert sorted(mapping["alm_key"] for mapping in recorded.values()) == sorted(configured.created)
+    labels = [label for key in configured.created for label in configured.issues[key]["labels"]]
+    assert sorted(labels.count(recorded[test_case_id]["id"]) for test_case_id in ids) == [1] * 25
+
+
+def test_push_maps_partially_rejected_batches_by_position(api, configured):
+    ids = seed_test_cases(api, 10, untitled={2, 7})
+
+    result = api.post("/api/alm/jira/push", json={"test_case_ids": ids}).json()
+    assert (result["pushed"], result["failed"], result["pending"]) == (8, 2, 0)
+
+    recorded = mappings(api)
+    assert {test_case_id for test_case_id, mapping in recorded.items() if mapping["status"] == "failed"} == {
+        "case-2", "case-7"}
+    for test_case_id in ids:
+        mapping = recorded[test_case_id]
+        if mapping["status"] == "pushed":
+            # The created issue carries this test case's title and idempotency key
+            issue = configured.issues[mapping["alm_key"]]
+            assert issue["summary"] == f"Case {test_case_id.split('-')[1]}"
+            assert mapping["id"] in issue["labels"]
+
+    # Failed cases are retried on the next push, pushed ones are skipped
+    retry = api.post("/api/alm/jira/push", json={"test_case_ids": ids}).json()
+    assert (retry["skipped"], retry["failed"]) == (8, 2)
@@ -0,0 +1,121 @@
+"""Token budget accounting and requirement-file parsing for batch generation"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+import server
+
+
+def test_budget_waits_until_tokens_refill(monkeypatch):
+    budget = server.TokenBudget(600)  # 10 tokens a second
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        budget.updated -= seconds
+
+    monkeypatch.setattr(server.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        assert await budget.acquire(550) == 550
+        return await budget.acquire(100)
+
+    assert asyncio.run(scenario()) == 100
+    assert slept and sum(slept) == pytest.approx(5, abs=0.1)
+
+
+def test_budget_clamps_requests_to_capacity():
+    budget = server.TokenBudget(100)
+    assert asyncio.run(budget.acquire(1000)) == 100
+    assert budget.available == pytest.approx(0, abs=1)
+
+
+def test_disabled_budget_never_waits():
+    budget = server.TokenBudget(0)
+    assert asyncio.run(budget.acquire(10**6)) == 0
+    budget.settle(0, 500)
+    assert budget.available == 0
+
+
+def test_settle_refunds_unused_tokens():
+    budget = server.TokenBudget(60_000)
+    reserved = asyncio.run(budget.acquire(40_000))
+    budget.settle(reserved, 10_000)
+    assert budget.available == pytest.approx(50_000, abs=50)
+
+
+def test_settle_charges_overrun():
+    budget = server.TokenBudget(60_000)
+    reserved = asyncio.run(budget.acquire(50_000))
+    budget.settle(reserved, 65_000)
+    # The overrun is owed: the budget goes negative and later callers wait it off
+    assert budget.available == pytest.approx(-5_000, abs=50)
+
+
+def test_settle_never_exceeds_capacity():
+    budget = server.TokenBudget(1_000)
+    budget.settle(1_000, 0)
+    assert budget.available == 1_000
+
+
+def test_settle_without_usage_keeps_reservation():
+    budget = server.TokenBudget(1_000)
+    reserved = asyncio.run(budget.acquire(400))
+    budget.settle(reserved, None)
+    assert budget.available == pytest.approx(600, abs=1)
+
+
+def test_parse_csv_with_aliases_and_defaults():
+    content = (
+        "﻿Key,Description,Type,Count\n"
+        "REQ-1,Users can reset their password,Security,3\n"
+        ",,,\n"
+        ",Admins can export reports,,\n"
+    ).encode()
+    requirements = server.parse_requirements("reqs.csv", content, "Functional", 5)
+    assert [r.dict() for r in requirements] == [
+        {"id": "REQ-1", "requirement": "Users can reset their password", "test_type": "Security", "num_test_cases": 3},
+        {"id": "row-3", "requirement": "Admins can export reports", "test_type": "Functional", "num_test_cases": 5},
+    ]
+
+
+def test_parse_json_list_and_wrapped_list():
+    rows = [{"id": 7, "requirement": "Search returns matching items"}, "Logout clears the session"]
+    for payload in (rows, {"requirements": rows}):
+        requirements = server.parse_requirements("reqs.JSON", json.dumps(payload).encode(), "Regression", 2)
+        assert [(r.id, r.requirement, r.test_type, r.num_test_cases) for r in requirements] == [
+            ("7", "Search returns matching items", "Regression", 2),
+            ("row-2", "Logout clears the session", "Regression", 2),
+        ]
+
+
+def test_parse_xlsx():
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["requirement_id", "Requirement", "num_test_cases"])
+    sheet.append(["R1", "Orders can be cancelled", 4])
+    sheet.append([None, None, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    requirements = server.parse_requirements("reqs.xlsx", buffer.getvalue(), "Functional", 5)
+    assert [(r.id, r.requirement, r.num_test_cases) for r in requirements] == [("R1", "Orders can be cancelled", 4)]
+
+
+def test_parse_reports_the_invalid_row():
+    content = b"requirement,count\nFirst,2\nSecond,many\n"
+    with pytest.raises(ValueError, match="row 2"):
+        server.parse_requirements("reqs.csv", content, "Functional", 5)
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("reqs.txt", b"Users can log in"),
+    ("reqs.json", b'"Users can log in"'),
+])
+def test_parse_rejects_unsupported_input(filename, content):
+    with pytest.raises(ValueError):
+        server.parse_requirements(filename, content, "Functional", 5)
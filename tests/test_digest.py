@@ -0,0 +1,36 @@
+"""The extractive transcript digest"""
+
+import server
+
+
+def test_digest_groups_cue_sentences_by_section():
+    text = (
+        "Can everyone hear me okay now, I was on mute.\n"
+        "The reset form must send a one-time code by email.\n"
+        "We decided to lock accounts after five failed attempts.\n"
+        "Given a locked account when the user signs in then the error message should say Account locked.\n"
+    )
+    assert server.extractive_digest(text) == (
+        "Decisions:\n"
+        "- We decided to lock accounts after five failed attempts.\n"
+        "Acceptance criteria:\n"
+        "- Given a locked account when the user signs in then the error message should say Account locked.\n"
+        "Requirements:\n"
+        "- The reset form must send a one-time code by email."
+    )
+
+
+def test_digest_keeps_repeated_points_once_and_skips_fragments():
+    text = "Exports must support CSV files. Okay. " * 5 + "Yes, must do."
+    assert server.extractive_digest(text) == "Requirements:\n- Exports must support CSV files."
+
+
+def test_digest_respects_the_character_budget():
+    sentences = [f"Report {number} must include the totals for every region." for number in range(200)]
+    digest = server.extractive_digest(" ".join(sentences), max_chars=500)
+    assert 0 < len(digest) <= 500 + len("Requirements:\n")
+    assert all(line[2:] in sentences for line in digest.splitlines()[1:])
+
+
+def test_digest_without_cues_is_empty():
+    assert server.extractive_digest("Let me share my screen real quick. Sorry about the noise there.") == ""
@@ -0,0 +1,91 @@
+"""The fast list path (projected documents encoded with orjson) must match the response models"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+import server
+
+# Stored documents per list endpoint, with every field set and a few the
+# response must not carry (_id, credentials, transcript storage fields)
+NOW = datetime(2024, 5, 1, 12, 30, 15, 123000)
+LIST_ENDPOINTS = {
+    "/api/ai-providers": (server.AIProviderConfig, server.AI_PROVIDER_PROJECTION, {
+        "id": "provider-1", "provider": "openai-compatible", "api_key": "sk-test", "model": "gpt-4",
+        "max_tokens": 2000, "temperature": 0.2, "base_url": "http://llm.local/v1", "max_connections": 8,
+        "max_keepalive_connections": 4, "request_timeout": 30.0, "created_at": NOW, "is_active": True,
+    }),
+    "/api/alm-configs": (server.ALMConfigSummary, server.ALM_CONFIG_PROJECTION, {
+        "id": "config-1", "alm_type": "jira", "base_url": "https://jira.local", "username": "qa@example.com",
+        "api_token": "secret", "project_key": "GEN", "jql": "labels = qa", "page_size": 50, "max_concurrency": 2,
+        "max_connections": 4, "request_timeout": 10.0, "push_issue_type": "Task", "push_batch_size": 20,
+        "sync_watermark": NOW - timedelta(hours=1), "last_synced_at": NOW, "created_at": NOW, "is_active": True,
+    }),
+    "/api/alm/{alm_type}/items": (server.ALMItem, server.ALM_ITEM_PROJECTION, {
+        "id": "config-1:GEN-1", "config_id": "config-1", "alm_type": "jira", "key": "GEN-1", "title": "Login",
+        "description": "Users log in with email", "item_type": "Story", "status": "Done", "priority": "High",
+        "labels": ["auth"], "url": "https://jira.local/browse/GEN-1", "updated_at": NOW, "synced_at": NOW,
+    }),
+    "/api/alm/{alm_type}/push-mappings": (server.ALMPushMapping, server.ALM_PUSH_MAPPING_PROJECTION, {
+        "id": "genstudio-abc", "test_case_id": "case-1", "alm_type": "jira", "config_id": "config-1",
+        "status": "pushed", "alm_key": "GEN-2", "alm_id": "10001", "error": None, "updated_at": NOW,
+    }),
+    "/api/test-cases": (server.TestCase, server.TEST_CASE_PROJECTION, {
+        "id": "case-1", "title": "Rejects bad passwords", "description": "Login validation",
+        "preconditions": "An account exists", "steps": ["Open login", "Enter a bad password"],
+        "expected_result": "An error is shown", "priority": "High", "category": "Security", "created_at": NOW,
+        "updated_at": NOW, "is_selected": True, "requirement_id": "REQ-1", "batch_id": "batch-1",
+    }),
+    "/api/transcripts": (server.Transcript, server.TRANSCRIPT_PROJECTION, {
+        "id": "transcript-1", "title": "Sprint planning", "content": "We agreed the login form must lock.",
+        "content_preview": "We agreed", "content_blob": b"\x28\xb5", "meeting_date": "2024-05-01",
+        "participants": "QA, Dev", "content_size": 36, "content_truncated": False, "digest": None,
+        "digest_status": "ready", "digest_method": "extractive", "created_at": NOW, "updated_at": NOW,
+    }),
+}
+
+
+def stored_documents(model, doc):
+    """The full document, then one written before each optional field existed"""
+    docs = [doc]
+    for name, field in model.model_fields.items():
+        # Fields filled by a factory (ids, timestamps) are always stored
+        if not field.is_required() and field.default_factory is None and name in doc:
+            docs.append({key: value for key, value in doc.items() if key != name})
+    return [{"_id": f"oid-{number}", **doc} for number, doc in enumerate(docs)]
+
+
+def find(docs, projection):
+    """What MongoDB returns for find({}, projection)"""
+    return [{key: value for key, value in doc.items() if projection.projection.get(key)} for doc in docs]
+
+
+def model_path(docs, model):
+    """What FastAPI renders: a model per document, validated again by response_model"""
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_python(adapter.validate_python([model(**doc) for doc in docs]), mode="json")
+
+
+@pytest.mark.parametrize("path", LIST_ENDPOINTS)
+def test_fast_path_matches_the_response_model(path):
+    model, projection, doc = LIST_ENDPOINTS[path]
+    docs = stored_documents(model, doc)
+    assert len(docs) > 1
+    assert json.loads(server.serialize_documents(find(docs, projection), projection)) == model_path(docs, model)
+
+
+@pytest.mark.parametrize("path", LIST_ENDPOINTS)
+def test_endpoint_declares_the_projected_model(path):
+    model, projection, _ = LIST_ENDPOINTS[path]
+    route = next(route for route in server.app.routes
+                 if getattr(route, "path", None) == path and "GET" in route.methods)
+    assert route.response_model == List[model]
+    assert set(projection.projection) - {"_id"} == set(model.model_fields)
+
+
+def test_credentials_are_not_listed():
+    _, projection, _ = LIST_ENDPOINTS["/api/alm-configs"]
+    assert "api_token" not in projection.projection
@@ -0,0 +1,23 @@
+"""Invalid environment settings stop the server at import"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent.parent / "backend"
+
+
+def import_server(**env):
+    return subprocess.run([sys.executable, "-c", "import server"], cwd=BACKEND_DIR,
+                          env={**os.environ, **env}, capture_output=True, text=True, timeout=60)
+
+
+def test_unknown_transcript_compression_fails_at_import():
+    result = import_server(TRANSCRIPT_COMPRESSION="lz4")
+    assert result.returncode != 0
+    assert "TRANSCRIPT_COMPRESSION must be 'zstd', 'gzip' or 'none', not 'lz4'" in result.stderr
+
+
+def test_transcript_compression_is_case_insensitive():
+    assert import_server(TRANSCRIPT_COMPRESSION="GZIP").returncode == 0
@@ -0,0 +1,101 @@
+"""Delta sync of the test case list: tokens, tombstones, resets and ETags"""
+
+from datetime import datetime, timedelta
+
+import server
+
+
+def seed(api, db, count, updated_at=None, prefix="case"):
+    updated_at = updated_at or datetime.utcnow()
+    docs = [server.TestCase(id=f"{prefix}-{number}", title=f"Case {number}", description="", preconditions="",
+                            steps=["Open the page"], expected_result="It opens",
+                            created_at=updated_at, updated_at=updated_at).dict()
+            for number in range(count)]
+    api.portal.call(db.test_cases.insert_many, docs)
+    return [doc["id"] for doc in docs]
+
+
+def sync_token(api):
+    response = api.get("/api/test-cases")
+    assert response.status_code == 200
+    return response.headers["x-sync-token"]
+
+
+def delta(api, since, **headers):
+    return api.get("/api/test-cases", params={"since": since}, headers=headers)
+
+
+def test_token_lags_the_clock(api):
+    token = datetime.fromisoformat(sync_token(api))
+    lag = datetime.utcnow() - token
+    assert server.SYNC_TOKEN_OVERLAP <= lag < server.SYNC_TOKEN_OVERLAP + timedelta(seconds=2)
+
+
+def test_delta_has_changes_and_deletions_since_the_token(api, db):
+    seed(api, db, 3, updated_at=datetime.utcnow() - timedelta(hours=1), prefix="old")
+    token = sync_token(api)
+    # Stamped just before the list was read, but after the lagging token
+    seed(api, db, 1, updated_at=datetime.utcnow() - timedelta(seconds=1), prefix="racing")
+    assert api.delete("/api/test-cases/old-0").status_code == 200
+
+    body = delta(api, token).json()
+    assert [item["id"] for item in body["items"]] == ["racing-0"]
+    assert body["deleted"] == ["old-0"]
+    assert body["full"] is False
+
+
+def test_tokens_before_a_delete_all_get_the_full_list(api, db):
+    seed(api, db, 2, prefix="before")
+    token = sync_token(api)
+    api.delete("/api/test-cases/before-0")
+    assert api.delete("/api/test-cases").status_code == 200
+    seed(api, db, 1, prefix="after")
+
+    body = delta(api, token).json()
+    assert body["full"] is True
+    assert [item["id"] for item in body["items"]] == ["after-0"]
+    assert body["deleted"] == []
+    # Delete-all leaves one reset marker rather than a tombstone per test case
+    assert api.portal.call(db.test_case_tombstones.count_documents, {}) == 0
+
+    later = (datetime.utcnow() + timedelta(seconds=1)).isoformat()
+    assert delta(api, later).json()["full"] is False
+
+
+def test_tokens_older_than_tombstone_retention_get_the_full_list(api, db):
+    seed(api, db, 2)
+    expired = datetime.utcnow() - timedelta(days=server.TOMBSTONE_RETENTION_DAYS, minutes=1)
+    body = delta(api, expired.isoformat()).json()
+    assert body["full"] is True
+    assert len(body["items"]) == 2
+
+
+def test_delta_over_the_limit_gets_the_full_list(api, db, monkeypatch):
+    monkeypatch.setattr(server, "TEST_CASE_LIST_LIMIT", 3)
+    token = sync_token(api)
+    seed(api, db, 3, prefix="first")
+    assert delta(api, token).json()["full"] is False
+
+    seed(api, db, 1, prefix="second")
+    assert delta(api, token).json()["full"] is True
+
+
+def test_timezone_aware_tokens_are_compared_in_utc(api, db):
+    seed(api, db, 1, updated_at=datetime.utcnow() - timedelta(minutes=30))
+    # 20 minutes ago, written in UTC-2
+    since = (datetime.utcnow() - timedelta(minutes=20) - timedelta(hours=2)).isoformat() + "-02:00"
+    assert delta(api, since).json()["items"] == []
+
+
+def test_unchanged_lists_answer_304(api, db):
+    seed(api, db, 2)
+    listed = api.get("/api/test-cases")
+    etag = listed.headers["etag"]
+    assert api.get("/api/test-cases", headers={"If-None-Match": etag}).status_code == 304
+
+    token = listed.headers["x-sync-token"]
+    changes = delta(api, token)
+    assert delta(api, token, **{"If-None-Match": changes.headers["etag"]}).status_code == 304
+
+    seed(api, db, 1, prefix="new")
+    assert api.get("/api/test-cases", headers={"If-None-Match": etag}).status_code == 200